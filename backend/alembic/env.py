@@ -1,3 +1,4 @@
+import os
 from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config
@@ -11,9 +12,15 @@ from app.models import Base  # Make sure this import is present
 # access to the values within the .ini file in use.
 config = context.config
 
+# A URL do alembic.ini é só o padrão local; DATABASE_URL (a mesma da aplicação)
+# tem precedência. '%' é escapado por causa da interpolação do configparser.
+if os.getenv("DATABASE_URL"):
+    config.set_main_option("sqlalchemy.url", os.environ["DATABASE_URL"].replace("%", "%%"))
+
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
-if config.config_file_name is not None:
+# Chamadas programáticas podem desligar isso para não sobrescrever o logging do processo.
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
     fileConfig(config.config_file_name)
 
 # add your model's MetaData object here
@@ -59,6 +66,15 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
+    # Conexão compartilhada por quem chama command.upgrade programaticamente
+    # (ex.: benchmarks.explain_check), em vez de abrir uma nova pela URL
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
@@ -0,0 +1,43 @@
+"""Add simulations keyset pagination index
+
+Revision ID: 3c7d1f9a2b64
+Revises: bea88376b8f2
+Create Date: 2026-10-17 09:12:41.215307
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c7d1f9a2b64'
+down_revision: Union[str, None] = 'bea88376b8f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY não bloqueia escritas na tabela, mas não pode rodar dentro de transação.
+    # IF NOT EXISTS: bancos criados pelo create_all da aplicação já têm o índice do modelo.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_simulations_user_id_created_at_id',
+            'simulations',
+            ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_simulations_user_id_created_at_id',
+            table_name='simulations',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
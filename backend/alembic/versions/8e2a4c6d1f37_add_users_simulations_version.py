@@ -0,0 +1,36 @@
+"""Add users.simulations_version
+
+Revision ID: 8e2a4c6d1f37
+Revises: 3c7d1f9a2b64
+Create Date: 2026-10-17 14:03:27.518402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e2a4c6d1f37'
+down_revision: Union[str, None] = '3c7d1f9a2b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Bancos criados pelo create_all da aplicação depois desta versão já têm a coluna
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('users')}
+    if 'simulations_version' not in columns:
+        # Default constante: no Postgres 11+ o ADD COLUMN não reescreve a tabela
+        op.add_column(
+            'users',
+            sa.Column('simulations_version', sa.Integer(), server_default='0', nullable=False),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('simulations_version')
@@ -20,13 +20,51 @@ depends_on: Union[str, Sequence[str], None] = None
 
 def upgrade() -> None:
     """Upgrade schema."""
-    # ### commands auto generated by Alembic - please adjust! ###
-    pass
-    # ### end Alembic commands ###
+    # Bancos criados antes das migrações (via create_all) já têm as tabelas
+    existing_tables = sa.inspect(op.get_bind()).get_table_names()
+
+    if 'users' not in existing_tables:
+        op.create_table(
+            'users',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('username', sa.String(), nullable=True),
+            sa.Column('email', sa.String(), nullable=True),
+            sa.Column('password_hash', sa.String(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column('last_login', sa.DateTime(timezone=True), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+        op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=True)
+        op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+
+    if 'simulations' not in existing_tables:
+        op.create_table(
+            'simulations',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('property_value', sa.Float(), nullable=False),
+            sa.Column('down_payment_percentage', sa.Float(), nullable=False),
+            sa.Column('contract_years', sa.Integer(), nullable=False),
+            sa.Column('down_payment_value', sa.Float(), nullable=False),
+            sa.Column('financing_amount', sa.Float(), nullable=False),
+            sa.Column('additional_costs', sa.Float(), nullable=False),
+            sa.Column('monthly_savings', sa.Float(), nullable=False),
+            sa.Column('name', sa.String(), nullable=True),
+            sa.Column('notes', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index(op.f('ix_simulations_id'), 'simulations', ['id'], unique=False)
 
 
 def downgrade() -> None:
     """Downgrade schema."""
-    # ### commands auto generated by Alembic - please adjust! ###
-    pass
-    # ### end Alembic commands ###
+    op.drop_index(op.f('ix_simulations_id'), table_name='simulations')
+    op.drop_table('simulations')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_index(op.f('ix_users_username'), table_name='users')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_table('users')
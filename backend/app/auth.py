@@ -1,13 +1,16 @@
+import hmac
 import os
+from dataclasses import dataclass
 from dotenv import load_dotenv
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+from typing import Optional
 
 from app import schemas, crud
-from app.database import get_db
+from app.core.cache import TTLCache
+from app.database import Database, get_database
 
 # Configurações de segurança
 load_dotenv()
@@ -15,9 +18,41 @@ SECRET_KEY = os.getenv("SECRET_KEY", "YOUR_SECRET_KEY")  # Em produção, use um
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Cache de token -> usuário; nunca guarda uma entrada além do `exp` do token
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+
+# Token das rotas de administração (/api/admin), enviado no cabeçalho X-Admin-Token.
+# Sem ele definido, essas rotas respondem 404.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+@dataclass(frozen=True)
+class CurrentUser:
+    """Snapshot imutável do usuário autenticado, seguro para compartilhar entre requisições."""
+    id: int
+    username: str
+    email: str
+    created_at: datetime
+
+_user_cache = TTLCache(maxsize=USER_CACHE_MAX_ENTRIES, ttl=USER_CACHE_TTL_SECONDS)
+
+def invalidate_user_cache(user_id: int):
+    _user_cache.delete_where(lambda user: user.id == user_id)
+
+def clear_user_cache():
+    _user_cache.clear()
+
+async def get_current_user(
+    request: Request, token: str = Depends(oauth2_scheme), db: Database = Depends(get_database)
+) -> CurrentUser:
+    cached_user = _user_cache.get(token)
+    if cached_user is not None:
+        # Lido pelo log de acesso (app.main.log_requests)
+        request.state.user_id = cached_user.id
+        return cached_user
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -31,7 +66,25 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         token_data = schemas.TokenData(email=username)
     except JWTError:
         raise credentials_exception
-    user = crud.get_user_by_email(db, email=token_data.email)
+    user = await db.run(crud.get_user_by_email, email=token_data.email)
     if user is None:
         raise credentials_exception
-    return user
+
+    current_user = CurrentUser(
+        id=user.id,
+        username=user.username,
+        email=user.email,
+        created_at=user.created_at,
+    )
+    _user_cache.set(token, current_user, expires_at=payload.get("exp"))
+    request.state.user_id = current_user.id
+    return current_user
+
+def is_admin_token(token: Optional[str]) -> bool:
+    return bool(ADMIN_TOKEN) and token is not None and hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
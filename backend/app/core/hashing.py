@@ -0,0 +1,97 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from passlib.context import CryptContext
+
+from app.core.logging import logger
+from app.core.metrics import HASHING_DURATION
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+HASHING_WORKERS = int(os.getenv("HASHING_WORKERS", "0")) or max(1, (os.cpu_count() or 2) // 2)
+# Operações aceitas (em execução + na fila) antes de responder 429
+HASHING_MAX_PENDING = int(os.getenv("HASHING_MAX_PENDING", "32"))
+
+
+class HashingPoolSaturated(Exception):
+    pass
+
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """Executa bcrypt em um pool de processos dedicado e limitado.
+
+    Mantém o trabalho de CPU fora das threads que atendem as requisições e
+    rejeita novas operações com `HashingPoolSaturated` quando a fila enche.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._total_seconds = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Sem fork: o servidor já tem threads rodando e um fork copiaria locks ocupados
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context(method)
+            )
+        return self._executor
+
+    async def _submit(self, operation: str, fn, *args):
+        if self._pending >= self.max_pending:
+            self._rejected += 1
+            logger.warning(f"Password hashing pool saturated ({self._pending} pending)")
+            raise HashingPoolSaturated("Too many authentication requests, try again shortly")
+
+        self._pending += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self._pending -= 1
+            self._completed += 1
+            elapsed = time.perf_counter() - start
+            self._total_seconds += elapsed
+            HASHING_DURATION.observe(elapsed, (operation,))
+
+    async def hash(self, password: str) -> str:
+        return await self._submit("hash", hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit("verify", verify_password, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "total_seconds": self._total_seconds,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+hasher = PasswordHasher(HASHING_WORKERS, HASHING_MAX_PENDING)
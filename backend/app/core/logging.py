@@ -1,40 +1,124 @@
+import contextvars
+import copy
 import logging
+import os
+import queue
 import sys
+import threading
+from datetime import datetime, timezone
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
+
+import orjson
+
+# Diretório dos arquivos de log; criado só quando o logging é configurado
+LOG_DIR = Path(os.getenv("LOG_DIR", "logs"))
+# Registros aguardando a thread de escrita; com a fila cheia o registro é descartado (e contado)
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Fração das requisições 2xx registradas no log de acesso; erros e requisições lentas sempre entram
+LOG_SAMPLE_2XX_RATE = float(os.getenv("LOG_SAMPLE_2XX_RATE", "1"))
+LOG_SLOW_REQUEST_MS = float(os.getenv("LOG_SLOW_REQUEST_MS", "1000"))
+
+# Logger da aplicação. Importar este módulo não cria diretórios nem handlers:
+# até setup_logging() rodar (no lifespan da aplicação) as mensagens seguem a
+# configuração padrão do processo.
+logger = logging.getLogger("app")
+# Uma linha por requisição, gravada pelo middleware de app.main
+access_logger = logging.getLogger("app.access")
+
+# Id da requisição em andamento; anexado a todo registro emitido durante ela
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+_configured = False
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+
+# Atributos de todo LogRecord; o que vier além disso (extra=...) vai para o JSON
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Um objeto JSON por linha, com os campos passados em `extra=` no nível de cima."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES)
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        # default=str: valores sem tipo JSON (ex.: Decimal, UUID) não derrubam a linha de log
+        return orjson.dumps(entry, default=str).decode()
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler que nunca espera: com a fila cheia, descarta o registro.
+
+    Também anexa o id da requisição corrente e resolve a mensagem (msg % args)
+    na thread de origem, já que os argumentos podem mudar depois.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        if getattr(record, "request_id", None) is None:
+            record.request_id = request_id_var.get()
+        record.msg = record.getMessage()
+        record.args = None
+        # exc_info segue como objeto: a fila é do próprio processo e a formatação fica com a thread de escrita
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
 
-# Create logs directory if it doesn't exist
-log_dir = Path("logs")
-log_dir.mkdir(exist_ok=True)
 
 # Configure logging
 def setup_logging():
+    global _configured, _listener, _queue_handler
+    root_logger = logging.getLogger()
+    # Idempotente: o lifespan pode rodar mais de uma vez no mesmo processo (ex.: testes)
+    if _configured:
+        return root_logger
+
+    LOG_DIR.mkdir(exist_ok=True)
+
     # Create formatters
-    file_formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    console_formatter = logging.Formatter(
-        '%(levelname)s - %(message)s'
-    )
+    formatter = JsonFormatter()
 
     # Create handlers
     file_handler = RotatingFileHandler(
-        log_dir / "app.log",
+        LOG_DIR / "app.log",
         maxBytes=10485760,  # 10MB
         backupCount=5
     )
-    file_handler.setFormatter(file_formatter)
+    file_handler.setFormatter(formatter)
     file_handler.setLevel(logging.INFO)
 
     console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(console_formatter)
+    console_handler.setFormatter(formatter)
     console_handler.setLevel(logging.INFO)
 
+    # Formatação e escrita em disco/stdout acontecem na thread do QueueListener;
+    # quem loga (event loop, threadpool) só enfileira o registro
+    _queue_handler = NonBlockingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    _listener = QueueListener(_queue_handler.queue, file_handler, console_handler, respect_handler_level=True)
+    _listener.start()
+
     # Configure root logger
-    root_logger = logging.getLogger()
     root_logger.setLevel(logging.INFO)
-    root_logger.addHandler(file_handler)
-    root_logger.addHandler(console_handler)
+    root_logger.addHandler(_queue_handler)
 
     # Configure specific loggers
     loggers = {
@@ -47,7 +131,45 @@ def setup_logging():
         logger = logging.getLogger(logger_name)
         logger.setLevel(level)
 
+    _configured = True
     return root_logger
 
-# Create logger instance
-logger = setup_logging() 
\ No newline at end of file
+
+def shutdown_logging():
+    """Para a thread de escrita depois de gravar o que ainda está na fila."""
+    global _configured, _listener, _queue_handler
+    if not _configured:
+        return
+    logging.getLogger().removeHandler(_queue_handler)
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _configured, _listener, _queue_handler = False, None, None
+
+
+def logging_stats() -> dict:
+    if _queue_handler is None:
+        return {"configured": False}
+    return {
+        "configured": True,
+        "queued": _queue_handler.queue.qsize(),
+        "queue_size": LOG_QUEUE_SIZE,
+        "dropped": _queue_handler.dropped,
+    }
+
+
+_route_templates = {}
+
+
+def route_template(scope) -> Optional[str]:
+    """Caminho declarado da rota que atendeu a requisição (ex.: /api/simulations/{simulation_id}).
+
+    O Starlette desta versão só deixa o `endpoint` no scope; o mapa endpoint -> caminho
+    é montado na primeira chamada. None quando nenhuma rota casou (404, redirects).
+    """
+    if not _route_templates:
+        for route in scope["app"].routes:
+            endpoint = getattr(route, "endpoint", None)
+            if endpoint is not None:
+                _route_templates.setdefault(endpoint, route.path)
+    return _route_templates.get(scope.get("endpoint"))
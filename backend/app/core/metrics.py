@@ -0,0 +1,293 @@
+import glob
+import json
+import math
+import os
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Com vários workers do Uvicorn, cada processo grava um snapshot das suas métricas neste
+# diretório e o /metrics de qualquer um deles soma todos. Limpe o diretório antes de subir
+# o servidor: arquivos de processos encerrados continuam somando contadores e histogramas.
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR")
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+HASHING_BUCKETS = (0.05, 0.1, 0.15, 0.2, 0.3, 0.5, 1.0, 2.5, 5.0)
+
+Labels = Tuple[str, ...]
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Labels, object] = {}
+        self._lock = threading.Lock()
+
+    def samples(self) -> Dict[Labels, object]:
+        with self._lock:
+            return {labels: self._copy(value) for labels, value in self._values.items()}
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, labels: Labels = ()):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    """Gauge; no modo multiprocesso, só processos vivos entram na soma."""
+
+    type = "gauge"
+
+    def inc(self, amount: float = 1, labels: Labels = ()):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, amount: float = 1, labels: Labels = ()):
+        self.inc(-amount, labels)
+
+    def set(self, value: float, labels: Labels = ()):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, labels: Labels = ()):
+        # Contagens por faixa (não acumuladas) + soma + total; acumuladas só na exposição
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @staticmethod
+    def _copy(value):
+        return [list(value[0]), value[1], value[2]]
+
+
+class CallbackMetric:
+    """Métrica lida na hora da coleta (ex.: estado do pool de conexões)."""
+
+    def __init__(self, name: str, documentation: str, type: str, labelnames: Sequence[str],
+                 callback: Callable[[], Dict[Labels, float]]):
+        self.name = name
+        self.documentation = documentation
+        self.type = type
+        self.labelnames = tuple(labelnames)
+        self._callback = callback
+
+    def samples(self) -> Dict[Labels, float]:
+        return self._callback()
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name: str, documentation: str, type: str, labelnames: Sequence[str],
+                 callback: Callable[[], Dict[Labels, float]]) -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, type, labelnames, callback))
+
+    def snapshot(self) -> dict:
+        """Estado atual de todas as métricas, serializável em JSON."""
+        families = {}
+        for metric in self._metrics:
+            families[metric.name] = {
+                "type": metric.type,
+                "help": metric.documentation,
+                "labelnames": list(metric.labelnames),
+                "buckets": list(getattr(metric, "buckets", ())),
+                "samples": [[list(labels), value] for labels, value in metric.samples().items()],
+            }
+        return families
+
+
+def merge_snapshots(snapshots: Iterable[Tuple[dict, bool]]) -> dict:
+    """Soma snapshots de vários processos; gauges de processos encerrados são ignorados."""
+    merged: Dict[str, dict] = {}
+    for families, alive in snapshots:
+        for name, family in families.items():
+            target = merged.setdefault(name, {**family, "samples": {}})
+            if family["type"] == "gauge" and not alive:
+                continue
+            for labels, value in family["samples"]:
+                key = tuple(labels)
+                current = target["samples"].get(key)
+                if family["type"] == "histogram":
+                    if current is None:
+                        current = target["samples"][key] = [[0] * len(value[0]), 0.0, 0]
+                    current[0] = [a + b for a, b in zip(current[0], value[0])]
+                    current[1] += value[1]
+                    current[2] += value[2]
+                else:
+                    target["samples"][key] = (current or 0) + value
+    return {
+        name: {**family, "samples": [[list(labels), value] for labels, value in family["samples"].items()]}
+        for name, family in merged.items()
+    }
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(families: dict) -> str:
+    """Formato de exposição em texto do Prometheus (version 0.0.4)."""
+    lines = []
+    for name, family in families.items():
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        labelnames = family["labelnames"]
+        for labels, value in family["samples"]:
+            if family["type"] != "histogram":
+                lines.append(f"{name}{_format_labels(labelnames, labels)} {_format_value(value)}")
+                continue
+            counts, total, count = value
+            cumulative = 0
+            for bound, bucket_count in zip(list(family["buckets"]) + [math.inf], counts):
+                cumulative += bucket_count
+                le = ("le", _format_value(float(bound)))
+                lines.append(f"{name}_bucket{_format_labels(labelnames, labels, le)} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labelnames, labels)} {_format_value(float(total))}")
+            lines.append(f"{name}_count{_format_labels(labelnames, labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MultiprocessExporter:
+    """Grava o snapshot deste processo em `directory` e agrega os de todos os workers."""
+
+    def __init__(self, registry: MetricsRegistry, directory: str, interval: float):
+        self.registry = registry
+        self.directory = directory
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.directory, f"metrics-{pid}.json")
+
+    def flush(self):
+        pid = os.getpid()
+        path = self._path(pid)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"pid": pid, "families": self.registry.snapshot()}, f)
+        # Troca atômica: quem agrega nunca lê um arquivo pela metade
+        os.replace(tmp, path)
+
+    def collect(self) -> dict:
+        self.flush()
+        snapshots = []
+        for path in glob.glob(os.path.join(self.directory, "metrics-*.json")):
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            snapshots.append((data["families"], _pid_alive(data["pid"])))
+        return merge_snapshots(snapshots)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def start(self):
+        if self._thread is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="metrics-flush", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            # Último snapshot: contadores deste processo continuam na soma depois que ele sai
+            self.flush()
+
+
+registry = MetricsRegistry()
+exporter = (
+    MultiprocessExporter(registry, METRICS_MULTIPROC_DIR, METRICS_FLUSH_SECONDS) if METRICS_MULTIPROC_DIR else None
+)
+
+
+def collect() -> dict:
+    return exporter.collect() if exporter is not None else registry.snapshot()
+
+
+# Métricas da aplicação
+REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route", "status"),
+)
+REQUESTS_IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled.", ("method",),
+)
+REQUEST_QUERIES = registry.histogram(
+    "db_queries_per_request", "SQL statements executed per HTTP request.", ("route",), buckets=QUERY_COUNT_BUCKETS,
+)
+DB_QUERIES = registry.counter("db_queries_total", "SQL statements executed.")
+HASHING_DURATION = registry.histogram(
+    "password_hashing_seconds", "bcrypt hash/verify time, including the wait for a pool worker.", ("operation",),
+    buckets=HASHING_BUCKETS,
+)
@@ -0,0 +1,182 @@
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import List, Optional
+
+from starlette.routing import Match
+
+from app.core.logging import logger
+
+# Perfis gravados aqui, um arquivo por requisição no formato "folded" (flamegraph.pl, speedscope)
+PROFILER_DIR = Path(os.getenv("PROFILER_DIR", "profiles"))
+# Retenção: só os N perfis mais recentes ficam no disco
+PROFILER_MAX_FILES = int(os.getenv("PROFILER_MAX_FILES", "50"))
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+# Limite por perfil, para uma requisição presa não amostrar para sempre
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "30"))
+
+# Pilhas cujo topo está nestes módulos são threads ociosas (event loop esperando I/O,
+# threadpool esperando trabalho, threads de log e métricas) e ficam fora do perfil
+_IDLE_MODULES = {"threading", "selectors", "queue"}
+
+
+class RequestProfile:
+    """Amostragem das pilhas de todas as threads do processo enquanto a requisição roda.
+
+    Amostras de outras requisições atendidas ao mesmo tempo pelo worker também entram;
+    cada pilha começa pelo nome da thread (event loop, threadpool).
+    """
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._labels = {}
+
+    def _label(self, frame) -> str:
+        code = frame.f_code
+        label = self._labels.get(code)
+        if label is None:
+            module = frame.f_globals.get("__name__", "?")
+            label = self._labels[code] = f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+        return label
+
+    def _sample(self, own_ident: int):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident or frame.f_globals.get("__name__") in _IDLE_MODULES:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame))
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            self.samples[";".join(reversed(stack))] += 1
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        deadline = time.monotonic() + self.profiler.max_seconds
+        while not self._stop.wait(self.profiler.interval) and time.monotonic() < deadline:
+            self._sample(own_ident)
+        # Escrita em disco na thread do profiler, nunca no event loop
+        try:
+            self.profiler.write(self)
+        except OSError:
+            logger.exception("Could not write request profile")
+        finally:
+            self.profiler.finished()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+class Profiler:
+    """Perfilamento opcional de requisições ao vivo, configurado pela API de administração.
+
+    Desligado (o padrão), o custo por requisição é uma verificação de atributo e a busca
+    de um cabeçalho. Um perfil por vez por processo: requisições sorteadas enquanto outro
+    perfil roda são ignoradas.
+    """
+
+    def __init__(self, directory: Path, max_files: int, interval_ms: float, max_seconds: float):
+        self.directory = directory
+        self.max_files = max_files
+        self.interval = interval_ms / 1000
+        self.max_seconds = max_seconds
+        self.enabled = False
+        self.sample_rate = 0.0
+        self.routes: List[str] = []
+        self.profiled = 0
+        self.skipped = 0
+        self._running = False
+        self._lock = threading.Lock()
+
+    def configure(self, enabled: bool, sample_rate: float, routes: List[str]):
+        self.sample_rate = sample_rate
+        self.routes = list(routes)
+        self.enabled = enabled
+
+    def _matches_route(self, scope) -> Optional[str]:
+        # O roteamento ainda não rodou; só acontece com o profiler ligado
+        for route in scope["app"].routes:
+            if route.matches(scope)[0] == Match.FULL:
+                path = getattr(route, "path", None)
+                return path if path in self.routes else None
+        return None
+
+    def wanted(self, scope) -> bool:
+        if not self.enabled or random.random() >= self.sample_rate:
+            return False
+        return not self.routes or self._matches_route(scope) is not None
+
+    def start(self, name: str) -> Optional[RequestProfile]:
+        with self._lock:
+            if self._running:
+                self.skipped += 1
+                return None
+            self._running = True
+        profile = RequestProfile(self, name)
+        profile.start()
+        return profile
+
+    def finished(self):
+        with self._lock:
+            self._running = False
+            self.profiled += 1
+
+    def write(self, profile: RequestProfile):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{profile.name}.folded"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text("".join(f"{stack} {count}\n" for stack, count in profile.samples.items()))
+        os.replace(tmp, path)
+        self._prune()
+
+    def _prune(self):
+        files = sorted(self.directory.glob("*.folded"), key=lambda p: p.stat().st_mtime)
+        for path in files[:max(len(files) - self.max_files, 0)]:
+            path.unlink(missing_ok=True)
+
+    def profiles(self) -> List[dict]:
+        if not self.directory.is_dir():
+            return []
+        files = sorted(self.directory.glob("*.folded"), key=lambda p: p.stat().st_mtime, reverse=True)
+        return [{"name": path.name, "bytes": path.stat().st_size} for path in files]
+
+    def profile_path(self, name: str) -> Optional[Path]:
+        # Só nomes gerados por profile_name(); nada de caminhos vindos do cliente
+        if not re.fullmatch(r"[\w.-]+\.folded", name):
+            return None
+        path = self.directory / name
+        return path if path.is_file() else None
+
+    def status(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "routes": self.routes,
+            "running": self._running,
+            "profiled": self.profiled,
+            "skipped": self.skipped,
+            "interval_ms": self.interval * 1000,
+            "max_files": self.max_files,
+        }
+
+
+def profile_name(method: str, path: str, request_id: str) -> str:
+    slug = re.sub(r"[^\w]+", "_", path).strip("_")[:60] or "root"
+    request_id = re.sub(r"[^\w-]+", "", request_id)[:64]
+    return f"{time.strftime('%Y%m%dT%H%M%S')}-{method}-{slug}-{request_id}"
+
+
+profiler = Profiler(PROFILER_DIR, PROFILER_MAX_FILES, PROFILER_INTERVAL_MS, PROFILER_MAX_SECONDS)
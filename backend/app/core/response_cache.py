@@ -0,0 +1,320 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Set
+
+# Backend do cache de respostas da listagem: "memory" (LRU por processo), "redis" ou "none"
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+# "memory://" usa o InMemoryRedis abaixo (testes e desenvolvimento sem servidor Redis)
+RESPONSE_CACHE_REDIS_URL = os.getenv("RESPONSE_CACHE_REDIS_URL", "redis://localhost:6379/0")
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "300"))
+# Limites do backend em memória; no Redis o limite global é o maxmemory do servidor
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "10000"))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Respostas maiores que isso não são guardadas (em nenhum backend)
+RESPONSE_CACHE_MAX_VALUE_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_VALUE_BYTES", str(1024 * 1024)))
+
+
+class CacheStats:
+    """Contadores de acerto, falha e descarte de um cache, seguros entre threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.oversized = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def record(self, counter: str, amount: int = 1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "sets": self.sets,
+                "oversized": self.oversized,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+class MemoryCacheBackend:
+    """LRU em memória, limitado em entradas e em bytes, com expiração por entrada.
+
+    As entradas são agrupadas por `namespace` (o usuário), para que uma
+    escrita descarte todas as páginas dele de uma vez.
+    """
+
+    name = "memory"
+    enabled = True
+
+    def __init__(self, max_entries: int, max_bytes: int, max_value_bytes: int, ttl: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_value_bytes = max_value_bytes
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._data: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._namespaces: Dict[Hashable, Set[str]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _remove(self, key: tuple):
+        value, _ = self._data.pop(key)
+        self._bytes -= len(value)
+        namespace, field = key
+        fields = self._namespaces[namespace]
+        fields.discard(field)
+        if not fields:
+            del self._namespaces[namespace]
+
+    async def get(self, namespace: Hashable, field: str) -> Optional[bytes]:
+        key = (namespace, field)
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[1] <= time.monotonic():
+                self._remove(key)
+                item = None
+            if item is None:
+                self.stats.record("misses")
+                return None
+            self._data.move_to_end(key)
+        self.stats.record("hits")
+        return item[0]
+
+    async def set(self, namespace: Hashable, field: str, value: bytes):
+        if len(value) > self.max_value_bytes:
+            self.stats.record("oversized")
+            return
+        key = (namespace, field)
+        evicted = 0
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._namespaces.setdefault(namespace, set()).add(field)
+            self._bytes += len(value)
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._data)))
+                evicted += 1
+        self.stats.record("sets")
+        if evicted:
+            self.stats.record("evictions", evicted)
+
+    async def invalidate(self, namespace: Hashable):
+        with self._lock:
+            for field in list(self._namespaces.get(namespace, ())):
+                self._remove((namespace, field))
+        self.stats.record("invalidations")
+
+    async def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._namespaces.clear()
+            self._bytes = 0
+
+    def info(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._data), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+    async def close(self):
+        pass
+
+
+class RedisCacheBackend:
+    """Cache compartilhado entre processos em um servidor Redis (ou compatível).
+
+    Cada namespace é um hash `<prefix>:<namespace>` com um campo por página;
+    a invalidação é um único DEL e o TTL vale para o hash inteiro.
+    """
+
+    name = "redis"
+    enabled = True
+
+    def __init__(self, client, max_value_bytes: int, ttl: float, prefix: str = "response-cache"):
+        self.client = client
+        self.max_value_bytes = max_value_bytes
+        self.ttl = ttl
+        self.prefix = prefix
+        self.stats = CacheStats()
+
+    def _key(self, namespace: Hashable) -> str:
+        return f"{self.prefix}:{namespace}"
+
+    async def get(self, namespace: Hashable, field: str) -> Optional[bytes]:
+        value = await self.client.hget(self._key(namespace), field)
+        self.stats.record("hits" if value is not None else "misses")
+        return value
+
+    async def set(self, namespace: Hashable, field: str, value: bytes):
+        if len(value) > self.max_value_bytes:
+            self.stats.record("oversized")
+            return
+        key = self._key(namespace)
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.hset(key, field, value)
+            pipe.expire(key, int(self.ttl))
+            await pipe.execute()
+        self.stats.record("sets")
+
+    async def invalidate(self, namespace: Hashable):
+        await self.client.delete(self._key(namespace))
+        self.stats.record("invalidations")
+
+    async def clear(self):
+        # Só as chaves deste cache, nunca o banco Redis inteiro
+        keys = [key async for key in self.client.scan_iter(match=f"{self.prefix}:*")]
+        if keys:
+            await self.client.delete(*keys)
+
+    def info(self) -> dict:
+        return {}
+
+    async def close(self):
+        await self.client.close()
+
+
+class NullCacheBackend:
+    """Cache desativado: toda consulta é uma falha e nada é guardado."""
+
+    name = "none"
+    enabled = False
+
+    def __init__(self):
+        self.stats = CacheStats()
+
+    async def get(self, namespace: Hashable, field: str) -> Optional[bytes]:
+        return None
+
+    async def set(self, namespace: Hashable, field: str, value: bytes):
+        pass
+
+    async def invalidate(self, namespace: Hashable):
+        pass
+
+    async def clear(self):
+        pass
+
+    def info(self) -> dict:
+        return {}
+
+    async def close(self):
+        pass
+
+
+class _InMemoryPipeline:
+    def __init__(self, client: "InMemoryRedis"):
+        self._client = client
+        self._commands = []
+
+    def __getattr__(self, name):
+        def queue(*args):
+            self._commands.append((name, args))
+            return self
+        return queue
+
+    async def execute(self) -> list:
+        commands, self._commands = self._commands, []
+        return [await getattr(self._client, name)(*args) for name, args in commands]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._commands = []
+
+
+class InMemoryRedis:
+    """Subconjunto assíncrono da API do redis-py usado pelo RedisCacheBackend, em memória.
+
+    Substituto local no estilo do fakeredis: testes e desenvolvimento exercitam
+    o backend Redis sem servidor. Não é compartilhado entre processos.
+    """
+
+    def __init__(self):
+        self._hashes: Dict[str, Dict[str, bytes]] = {}
+        self._deadlines: Dict[str, float] = {}
+
+    def _expire_if_due(self, key: str):
+        deadline = self._deadlines.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self._hashes.pop(key, None)
+            del self._deadlines[key]
+
+    async def hget(self, key: str, field: str) -> Optional[bytes]:
+        self._expire_if_due(key)
+        return self._hashes.get(key, {}).get(field)
+
+    async def hset(self, key: str, field: str, value: bytes) -> int:
+        self._expire_if_due(key)
+        fields = self._hashes.setdefault(key, {})
+        created = field not in fields
+        fields[field] = bytes(value)
+        return int(created)
+
+    async def expire(self, key: str, seconds: int) -> bool:
+        self._expire_if_due(key)
+        if key not in self._hashes:
+            return False
+        self._deadlines[key] = time.monotonic() + seconds
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        deleted = 0
+        for key in keys:
+            self._expire_if_due(key)
+            deleted += self._hashes.pop(key, None) is not None
+            self._deadlines.pop(key, None)
+        return deleted
+
+    async def scan_iter(self, match: str = "*"):
+        prefix = match.rstrip("*")
+        for key in list(self._hashes):
+            if key.startswith(prefix):
+                yield key
+
+    def pipeline(self, transaction: bool = True) -> _InMemoryPipeline:
+        return _InMemoryPipeline(self)
+
+    async def close(self):
+        pass
+
+
+def create_cache_backend(backend: str = RESPONSE_CACHE_BACKEND, redis_url: str = RESPONSE_CACHE_REDIS_URL):
+    if backend == "none":
+        return NullCacheBackend()
+    if backend == "memory":
+        return MemoryCacheBackend(
+            max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+            max_bytes=RESPONSE_CACHE_MAX_BYTES,
+            max_value_bytes=RESPONSE_CACHE_MAX_VALUE_BYTES,
+            ttl=RESPONSE_CACHE_TTL_SECONDS,
+        )
+    if backend == "redis":
+        if redis_url == "memory://":
+            client = InMemoryRedis()
+        else:
+            # Dependência opcional: só quem usa o backend Redis precisa do pacote redis
+            try:
+                import redis.asyncio
+            except ImportError as e:
+                raise RuntimeError("RESPONSE_CACHE_BACKEND=redis requires the 'redis' package") from e
+            client = redis.asyncio.Redis.from_url(redis_url)
+        return RedisCacheBackend(client, max_value_bytes=RESPONSE_CACHE_MAX_VALUE_BYTES, ttl=RESPONSE_CACHE_TTL_SECONDS)
+    raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND: {backend}")
+
+
+# Páginas serializadas de GET /api/simulations, por usuário
+simulation_list_cache = create_cache_backend()
+
+
+def cache_stats(cache=simulation_list_cache) -> dict:
+    return {"backend": cache.name, **cache.stats.snapshot(), **cache.info()}
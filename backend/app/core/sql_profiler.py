@@ -0,0 +1,107 @@
+import contextvars
+import logging
+import os
+import time
+from typing import Optional
+
+from sqlalchemy import event
+
+from app.core.metrics import DB_QUERIES
+
+# Comandos mais lentos que isso são registrados no logger app.sql, com o formato dos parâmetros
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+# Tamanho máximo do comando SQL nos logs e no resumo da requisição
+SQL_LOG_MAX_CHARS = 2000
+
+sql_logger = logging.getLogger("app.sql")
+
+
+class RequestStats:
+    """Consultas da requisição em andamento: quantidade, tempo total e a mais lenta."""
+
+    __slots__ = ("queries", "db_seconds", "slowest_seconds", "slowest_statement")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement: Optional[str] = None
+
+    def record(self, statement: str, seconds: float):
+        self.db_seconds += seconds
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+    def server_timing(self) -> str:
+        """Valor do cabeçalho Server-Timing (durações em ms)."""
+        return (
+            f'db;dur={self.db_seconds * 1000:.3f};desc="{self.queries} queries", '
+            f"db-slowest;dur={self.slowest_seconds * 1000:.3f}"
+        )
+
+
+# Objeto mutável no contexto: o threadpool e as tasks filhas copiam o contexto, não o objeto
+request_stats_var: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    "request_stats", default=None
+)
+
+
+def compact_statement(statement: str) -> str:
+    statement = " ".join(statement.split())
+    if len(statement) > SQL_LOG_MAX_CHARS:
+        statement = statement[:SQL_LOG_MAX_CHARS] + "..."
+    return statement
+
+
+def _value_shape(value) -> str:
+    if isinstance(value, (list, tuple)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+def _parameters_shape(parameters):
+    if isinstance(parameters, dict):
+        return {key: _value_shape(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_value_shape(value) for value in parameters]
+    return None
+
+
+def parameter_shape(parameters, executemany: bool = False):
+    """Tipos dos parâmetros, nunca os valores (que podem trazer dados pessoais)."""
+    if executemany:
+        rows = list(parameters or ())
+        return {"rows": len(rows), "row": _parameters_shape(rows[0]) if rows else None}
+    return _parameters_shape(parameters)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    DB_QUERIES.inc()
+    stats = request_stats_var.get()
+    if stats is not None:
+        stats.queries += 1
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_started", None)
+    if started is None:
+        return
+    seconds = time.perf_counter() - started
+    stats = request_stats_var.get()
+    if stats is not None:
+        stats.record(statement, seconds)
+    if seconds * 1000 >= DB_SLOW_QUERY_MS:
+        sql_logger.warning("Slow query", extra={
+            "duration_ms": round(seconds * 1000, 3),
+            "statement": compact_statement(statement),
+            "parameters": parameter_shape(parameters, executemany),
+        })
+
+
+def instrument_engine(engine):
+    """Conta e cronometra os comandos SQL de `engine` (para um AsyncEngine, use `.sync_engine`)."""
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
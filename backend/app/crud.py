@@ -1,20 +1,24 @@
+import io
+
+import numpy as np
+from sqlalchemy import delete, insert, literal, select, tuple_, update
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from jose import jwt
-from passlib.context import CryptContext
-from typing import Optional
+from typing import List, Optional, Tuple
 
 from app import models, schemas
-from app.auth import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.engine import calculate_simulation, calculate_simulations
+from app.auth import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, invalidate_user_cache
+from app.core import hashing
 
 # Funções de autenticação
+# Versões síncronas; as rotas usam `hashing.hasher`, que roda bcrypt fora da thread da requisição
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return hashing.verify_password(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return hashing.hash_password(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -27,22 +31,26 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 # Funções de usuário
+def get_user(db: Session, user_id: int):
+    return db.get(models.User, user_id)
+
 def get_user_by_username(db: Session, username: str):
     return db.query(models.User).filter(models.User.username == username).first()
 
 def get_user_by_email(db: Session, email: str):
     return db.query(models.User).filter(models.User.email == email).first()
 
-def create_user(db: Session, user: schemas.UserCreate):
-    hashed_password = get_password_hash(user.password)
+def create_user(db: Session, user: schemas.UserCreate, hashed_password: Optional[str] = None):
+    if hashed_password is None:
+        hashed_password = get_password_hash(user.password)
     db_user = models.User(
         username=user.username,
         email=user.email,
         password_hash=hashed_password
     )
     db.add(db_user)
+    # created_at volta no próprio INSERT ... RETURNING (eager_defaults no modelo); sem refresh
     db.commit()
-    db.refresh(db_user)
     return db_user
 
 def authenticate_user(db: Session, email: str, password: str):
@@ -51,14 +59,23 @@ def authenticate_user(db: Session, email: str, password: str):
         return False
     if not verify_password(password, user.password_hash):
         return False
+    record_login(db, user)
+    return user
+
+def record_login(db: Session, user: models.User):
     # Atualizar último login
     user.last_login = datetime.utcnow()
     db.commit()
-    return user
 
-def update_user(db: Session, user: models.User, user_update: schemas.UserUpdate):
-    # Verify current password
-    if not verify_password(user_update.current_password, user.password_hash):
+def update_user(
+    db: Session,
+    user: models.User,
+    user_update: schemas.UserUpdate,
+    new_password_hash: Optional[str] = None,
+    password_verified: bool = False,
+):
+    # Verify current password (unless the caller already did it off-thread)
+    if not password_verified and not verify_password(user_update.current_password, user.password_hash):
         raise ValueError("Current password is incorrect")
     
     # Check if new username is already taken by another user
@@ -78,81 +95,219 @@ def update_user(db: Session, user: models.User, user_update: schemas.UserUpdate)
     user.email = user_update.email
     
     # Update password if provided
-    if user_update.new_password:
+    if new_password_hash is not None:
+        user.password_hash = new_password_hash
+    elif user_update.new_password:
         user.password_hash = get_password_hash(user_update.new_password)
     
     db.commit()
-    db.refresh(user)
+    # Tokens já emitidos não podem continuar resolvendo para o snapshot antigo
+    invalidate_user_cache(user.id)
     return user
 
 # Funções de simulação
-def get_simulation(db: Session, simulation_id: int):
-    return db.query(models.Simulation).filter(models.Simulation.id == simulation_id).first()
+# Sincroniza a sessão com as linhas do próprio RETURNING; a estratégia padrão ("evaluate")
+# carregaria objetos expirados com um SELECT antes do UPDATE/DELETE
+SYNCHRONIZE_BY_RETURNING = {"synchronize_session": "fetch", "populate_existing": True}
+
+def _owned(statement, simulation_id: int, user_id: Optional[int]):
+    # Com user_id, a simulação de outro usuário é tratada como inexistente pelo próprio WHERE
+    statement = statement.where(models.Simulation.id == simulation_id)
+    if user_id is not None:
+        statement = statement.where(models.Simulation.user_id == user_id)
+    return statement
+
+def _bump_simulations_version(db: Session, user_id: int):
+    # Na mesma transação da escrita: quem vê a nova versão vê também as linhas novas
+    db.execute(
+        update(models.User).where(models.User.id == user_id).values(
+            simulations_version=models.User.simulations_version + 1
+        ),
+        execution_options={"synchronize_session": False},
+    )
 
-def get_simulations(db: Session, user_id: int, skip: int = 0, limit: int = 100):
-    return db.query(models.Simulation).filter(
+def get_simulations_version(db: Session, user_id: int) -> Optional[int]:
+    return db.scalar(select(models.User.simulations_version).where(models.User.id == user_id))
+
+def get_simulation(db: Session, simulation_id: int, user_id: Optional[int] = None):
+    query = db.query(models.Simulation).filter(models.Simulation.id == simulation_id)
+    if user_id is not None:
+        query = query.filter(models.Simulation.user_id == user_id)
+    return query.first()
+
+def get_simulation_with_version(db: Session, simulation_id: int, user_id: int):
+    # Simulação e versão da lista do dono em um único SELECT por chave primária (ETag da rota)
+    return db.execute(
+        _owned(select(models.Simulation, models.User.simulations_version), simulation_id, user_id)
+        .join(models.User, models.User.id == models.Simulation.user_id)
+    ).first()
+
+# Funciona tanto com db.query(...) quanto com select(...)
+def _user_simulations(statement, user_id: int, skip: int, limit: int, after: Optional[Tuple[datetime, int]]):
+    # Mais recentes primeiro; `after` = (created_at, id) da última linha da página anterior
+    statement = statement.where(
         models.Simulation.user_id == user_id
-    ).offset(skip).limit(limit).all()
+    ).order_by(models.Simulation.created_at.desc(), models.Simulation.id.desc())
+    if after is not None:
+        created_at, simulation_id = after
+        # Parâmetros tipados com o tipo da coluna, para serem gravados no mesmo formato dos valores armazenados
+        cursor = tuple_(
+            literal(created_at, models.Simulation.created_at.type),
+            literal(simulation_id, models.Simulation.id.type),
+        )
+        statement = statement.where(tuple_(models.Simulation.created_at, models.Simulation.id) < cursor)
+    if skip:
+        statement = statement.offset(skip)
+    return statement.limit(limit)
 
-def create_simulation(db: Session, simulation: schemas.SimulationCreate, user_id: int):
-    # Calcular valores derivados com base nos dados de entrada
-    property_value = simulation.property_value
-    down_payment_percentage = simulation.down_payment_percentage
-    contract_years = simulation.contract_years
+def get_simulations(
+    db: Session,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Tuple[datetime, int]] = None,
+):
+    return _user_simulations(db.query(models.Simulation), user_id, skip, limit, after).all()
 
-    down_payment_value = property_value * (down_payment_percentage / 100)
-    financing_amount = property_value - down_payment_value
-    additional_costs = property_value * 0.15
-    # Evitar divisão por zero caso anos de contrato seja 0
-    monthly_savings = additional_costs / (contract_years * 12) if contract_years > 0 else additional_costs # Ou 0, dependendo da regra de negócio para 0 anos
+# Colunas expostas por schemas.Simulation, na ordem do schema
+SIMULATION_COLUMNS = [getattr(models.Simulation, name) for name in schemas.Simulation.__fields__]
+
+def get_simulation_page(
+    db: Session,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Tuple[datetime, int]] = None,
+) -> Tuple[Optional[int], list]:
+    """Página da listagem e a versão da lista do usuário, lidas no mesmo comando.
+
+    Mesma consulta de get_simulations, mas em tuplas com as colunas da resposta
+    (sem objetos ORM nem identity map, as linhas vão direto para o encoder JSON)
+    seguidas da versão, como subconsulta escalar: página e versão vêm do mesmo
+    snapshot. Só uma página vazia precisa de um segundo SELECT para a versão.
+    """
+    version = select(models.User.simulations_version).where(models.User.id == user_id).scalar_subquery()
+    statement = select(*SIMULATION_COLUMNS, version.label("list_version"))
+    rows = db.execute(_user_simulations(statement, user_id, skip, limit, after)).all()
+    if not rows:
+        return get_simulations_version(db, user_id), rows
+    return rows[0].list_version, rows
+
+def simulation_export_query(user_id: int):
+    # Todas as simulações do usuário, na ordem do índice (user_id, created_at DESC, id DESC)
+    return select(*SIMULATION_COLUMNS).where(models.Simulation.user_id == user_id).order_by(
+        models.Simulation.created_at.desc(), models.Simulation.id.desc()
+    )
 
+def create_simulation(db: Session, simulation: schemas.SimulationCreate, user_id: int):
+    # Calcular valores derivados com base nos dados de entrada
+    result = calculate_simulation(
+        simulation.property_value,
+        simulation.down_payment_percentage,
+        simulation.contract_years,
+    )
     db_simulation = models.Simulation(
         user_id=user_id,
-        property_value=property_value,
-        down_payment_percentage=down_payment_percentage,
-        contract_years=contract_years,
-        down_payment_value=down_payment_value,
-        financing_amount=financing_amount,
-        additional_costs=additional_costs,
-        monthly_savings=monthly_savings,
-        name=simulation.name,
-        notes=simulation.notes
+        **simulation.dict(),
+        **result._asdict()
     )
     db.add(db_simulation)
+    _bump_simulations_version(db, user_id)
+    # id, created_at e updated_at voltam no próprio INSERT ... RETURNING; sem refresh
     db.commit()
-    db.refresh(db_simulation)
     return db_simulation
 
-def update_simulation(db: Session, simulation_id: int, simulation: schemas.SimulationUpdate):
-    db_simulation = get_simulation(db, simulation_id)
-    if not db_simulation:
-        return None # Retornar None se a simulação não for encontrada
-
-    # Atualizar campos básicos
-    db_simulation.property_value = simulation.property_value
-    db_simulation.down_payment_percentage = simulation.down_payment_percentage
-    db_simulation.contract_years = simulation.contract_years
-    db_simulation.name = simulation.name
-    db_simulation.notes = simulation.notes
-
-    # Recalcular valores derivados com base nos campos atualizados
-    property_value = db_simulation.property_value
-    down_payment_percentage = db_simulation.down_payment_percentage
-    contract_years = db_simulation.contract_years
-
-    db_simulation.down_payment_value = property_value * (down_payment_percentage / 100)
-    db_simulation.financing_amount = property_value - db_simulation.down_payment_value
-    db_simulation.additional_costs = property_value * 0.15
-     # Evitar divisão por zero caso anos de contrato seja 0
-    db_simulation.monthly_savings = db_simulation.additional_costs / (contract_years * 12) if contract_years > 0 else db_simulation.additional_costs # Ou 0, dependendo da regra de negócio para 0 anos
+def _simulation_rows(simulations: List[schemas.SimulationCreate], user_id: int) -> List[dict]:
+    # Monta as linhas por colunas: um simulation.dict() por linha custaria mais que o INSERT
+    columns = {name: [s.__dict__[name] for s in simulations] for name in schemas.SimulationCreate.__fields__}
+    # Valores derivados de todas as simulações em uma única passada NumPy
+    derived = calculate_simulations(
+        np.asarray(columns["property_value"], dtype=np.float64),
+        np.asarray(columns["down_payment_percentage"], dtype=np.float64),
+        np.asarray(columns["contract_years"], dtype=np.int64),
+    )
+    columns.update((name, values.tolist()) for name, values in derived._asdict().items())
+    columns["user_id"] = [user_id] * len(simulations)
+
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*columns.values())]
 
+def create_simulations_batch(db: Session, simulations: List[schemas.SimulationCreate], user_id: int) -> List[int]:
+    rows = _simulation_rows(simulations, user_id)
+    # Um único INSERT multi-valores com RETURNING, em vez de add/commit/refresh por simulação.
+    # sort_by_parameter_order garante que os ids voltam na ordem da entrada (o Postgres não
+    # garante a ordem do RETURNING em INSERTs multi-valores).
+    ids = db.scalars(
+        insert(models.Simulation).returning(models.Simulation.id, sort_by_parameter_order=True),
+        rows,
+    ).all()
+    _bump_simulations_version(db, user_id)
     db.commit()
-    db.refresh(db_simulation)
-    return db_simulation
+    return list(ids)
+
+def _copy_value(value) -> str:
+    # Formato texto do COPY: \N é NULL; barra, tab e quebras de linha são escapadas
+    if value is None:
+        return "\\N"
+    if isinstance(value, str):
+        return value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+    return repr(value)
 
-def delete_simulation(db: Session, simulation_id: int):
-    db_simulation = get_simulation(db, simulation_id)
-    if db_simulation:
-        db.delete(db_simulation)
-        db.commit()
-    return db_simulation # Retorna a simulação deletada ou None se não encontrada
+def copy_simulation_rows(db: Session, rows: List[dict]):
+    """Grava `rows` com COPY FROM STDIN pela conexão da sessão (mesma transação)."""
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(_copy_value(row[column]) for column in columns))
+        buffer.write("\n")
+    buffer.seek(0)
+
+    preparer = db.get_bind().dialect.identifier_preparer
+    statement = "COPY {} ({}) FROM STDIN".format(
+        preparer.format_table(models.Simulation.__table__),
+        ", ".join(preparer.quote(column) for column in columns),
+    )
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(statement, buffer)
+    finally:
+        cursor.close()
+
+def import_simulations(db: Session, simulations: List[schemas.SimulationCreate], user_id: int) -> int:
+    # Não faz commit: o import inteiro é uma transação, confirmada pela rota depois do último bloco
+    rows = _simulation_rows(simulations, user_id)
+    if db.get_bind().dialect.driver == "psycopg2":
+        copy_simulation_rows(db, rows)
+    else:
+        # SQLite e drivers asyncio: executemany, sem RETURNING (os ids não são devolvidos)
+        db.execute(insert(models.Simulation), rows)
+    _bump_simulations_version(db, user_id)
+    return len(rows)
+
+def update_simulation(db: Session, simulation_id: int, simulation: schemas.SimulationUpdate, user_id: Optional[int] = None):
+    # Atualizar campos básicos e recalcular valores derivados
+    result = calculate_simulation(
+        simulation.property_value,
+        simulation.down_payment_percentage,
+        simulation.contract_years,
+    )
+    # Um único UPDATE ... WHERE id AND user_id RETURNING: checagem do dono, gravação e
+    # leitura dos valores finais (incluindo updated_at) na mesma ida ao banco
+    statement = _owned(update(models.Simulation), simulation_id, user_id).values(
+        **simulation.dict(), **result._asdict()
+    ).returning(models.Simulation)
+    db_simulation = db.scalars(statement, execution_options=SYNCHRONIZE_BY_RETURNING).one_or_none()
+    if db_simulation is not None:
+        _bump_simulations_version(db, db_simulation.user_id)
+    db.commit()
+    return db_simulation # None se a simulação não for encontrada
+
+def delete_simulation(db: Session, simulation_id: int, user_id: Optional[int] = None) -> Optional[int]:
+    statement = _owned(delete(models.Simulation), simulation_id, user_id).returning(
+        models.Simulation.id, models.Simulation.user_id
+    )
+    deleted = db.execute(statement, execution_options=SYNCHRONIZE_BY_RETURNING).one_or_none()
+    if deleted is not None:
+        _bump_simulations_version(db, deleted.user_id)
+    db.commit()
+    return deleted.id if deleted is not None else None # None se a simulação não for encontrada
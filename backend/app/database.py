@@ -1,21 +1,224 @@
 import os
+import threading
+import time
 from dotenv import load_dotenv
+from fastapi import Depends
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from app.core.metrics import registry
+from app.core.sql_profiler import instrument_engine
 
 load_dotenv()
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432/amora")
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+# Driver asyncio por dialeto, usado quando DATABASE_ASYNC está ativo
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def to_async_url(url: str) -> str:
+    scheme, separator, rest = url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + separator + rest
+
+DATABASE_ASYNC = _env_flag("DATABASE_ASYNC", "false")
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(SQLALCHEMY_DATABASE_URL)
+
+# Pool de conexões; o total por processo é DB_POOL_SIZE + DB_MAX_OVERFLOW
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = _env_flag("DB_POOL_PRE_PING", "true")
+# Atrás do pgbouncer (transaction pooling): sem pool local e sem prepared statements
+DB_PGBOUNCER = _env_flag("DB_PGBOUNCER", "false")
+# Em produção o schema vem do Alembic (alembic upgrade head) e a aplicação não roda DDL ao subir
+DB_SKIP_DDL = _env_flag("DB_SKIP_DDL", "false")
+
+class PoolStats:
+    """Contadores de checkout de conexões de um pool, seguros entre threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_seconds_total = 0.0
+        self.checkout_seconds_max = 0.0
+
+    def record_checkout(self, seconds: float):
+        with self._lock:
+            self.checkouts += 1
+            self.checkout_seconds_total += seconds
+            self.checkout_seconds_max = max(self.checkout_seconds_max, seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "checkout_seconds_total": self.checkout_seconds_total,
+                "checkout_seconds_max": self.checkout_seconds_max,
+            }
+
+class _TimedCheckoutMixin:
+    stats: PoolStats
+
+    def connect(self):
+        # Inclui a espera por uma conexão livre (ou a abertura de uma nova)
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            self.stats.record_checkout(time.perf_counter() - start)
+
+def instrumented_pool_class(base):
+    """Subclasse de `base` com estatísticas próprias (preservadas em `Pool.recreate`)."""
+    return type(f"Instrumented{base.__name__}", (_TimedCheckoutMixin, base), {"stats": PoolStats()})
+
+def engine_options(url: str, asyncio: bool = False) -> dict:
+    if url.startswith("sqlite"):
+        return {}
+    if DB_PGBOUNCER:
+        options = {"poolclass": instrumented_pool_class(NullPool)}
+        if asyncio:
+            options["connect_args"] = {"statement_cache_size": 0, "prepared_statement_cache_size": 0}
+        return options
+    return {
+        "poolclass": instrumented_pool_class(AsyncAdaptedQueuePool if asyncio else QueuePool),
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+def pool_status(pool) -> dict:
+    status = {"class": type(pool).__name__}
+    for name in ("size", "checkedout", "checkedin", "overflow"):
+        method = getattr(pool, name, None)
+        if method is not None:
+            status[name] = method()
+    stats = getattr(type(pool), "stats", None)
+    if stats is not None:
+        status.update(stats.snapshot())
+    return status
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_options(SQLALCHEMY_DATABASE_URL))
+# expire_on_commit=False: o objeto devolvido por um UPDATE ... RETURNING já está completo;
+# expirá-lo no commit faria a serialização da resposta repetir o SELECT
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+async_engine = (
+    create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL, asyncio=True))
+    if DATABASE_ASYNC else None
+)
+# expire_on_commit=False: objetos retornados não podem disparar lazy loads fora do greenlet
+AsyncSessionLocal = (
+    async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False) if DATABASE_ASYNC else None
+)
+
+# Contagem e tempo dos comandos SQL por requisição (métricas, Server-Timing e log de consultas lentas)
+instrument_engine(engine)
+if async_engine is not None:
+    instrument_engine(async_engine.sync_engine)
 
 Base = declarative_base()
 
+def get_pool_status() -> dict:
+    return {
+        "sync": pool_status(engine.pool),
+        "async": pool_status(async_engine.pool) if async_engine is not None else None,
+    }
+
+def _pool_samples(key: str) -> dict:
+    samples = {}
+    for name, status in get_pool_status().items():
+        if status is not None and key in status:
+            samples[(name,)] = status[key]
+    return samples
+
+# Lidos do pool na hora da coleta do /metrics
+for _name, _key, _type, _help in (
+    ("db_pool_size", "size", "gauge", "Configured connection pool size."),
+    ("db_pool_checked_out", "checkedout", "gauge", "Connections currently checked out of the pool."),
+    ("db_pool_overflow", "overflow", "gauge", "Connections open beyond the pool size."),
+    ("db_pool_checkouts_total", "checkouts", "counter", "Connection checkouts."),
+    ("db_pool_checkout_seconds_total", "checkout_seconds_total", "counter", "Time spent checking out connections."),
+):
+    registry.callback(_name, _help, _type, ("engine",), lambda key=_key: _pool_samples(key))
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+class Database:
+    """Acesso awaitable às funções de `crud` a partir de rotas assíncronas.
+
+    `await db.run(crud.get_simulation, simulation_id)` executa a função com a
+    sessão da requisição como primeiro argumento. Com uma `AsyncSession` a
+    função roda via `run_sync` sobre o driver asyncio, sem ocupar threads; com
+    uma `Session` síncrona ela roda no threadpool do Starlette.
+
+    No modo síncrono cada `run` é um salto até o threadpool (e de volta ao
+    event loop). Rotas devem fazer o trabalho de banco em uma única chamada,
+    com a lógica agrupada na função de `crud`, e só dividir em várias chamadas
+    quando houver um `await` entre elas (ex.: bcrypt no login e no cadastro).
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    async def run(self, fn, *args, **kwargs):
+        if isinstance(self.session, AsyncSession):
+            return await self.session.run_sync(fn, *args, **kwargs)
+        return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+    async def commit(self):
+        """Confirma a transação de trabalho feito em várias chamadas a `run` (ex.: import em blocos)."""
+        if isinstance(self.session, AsyncSession):
+            await self.session.commit()
+        else:
+            await run_in_threadpool(self.session.commit)
+
+    async def stream(self, statement, partition_size: int):
+        """Itera o resultado de `statement` em listas de até `partition_size` linhas.
+
+        Usa `yield_per`, que no Postgres abre um cursor do lado do servidor: só
+        uma partição fica em memória por vez, qualquer que seja o total.
+        """
+        statement = statement.execution_options(yield_per=partition_size)
+        if isinstance(self.session, AsyncSession):
+            result = await self.session.stream(statement)
+            async for partition in result.partitions():
+                yield partition
+            return
+
+        result = await run_in_threadpool(self.session.execute, statement)
+        partitions = result.partitions()
+        try:
+            while True:
+                partition = await run_in_threadpool(next, partitions, None)
+                if partition is None:
+                    break
+                yield partition
+        finally:
+            result.close()
+
+if DATABASE_ASYNC:
+    async def get_database():
+        async with AsyncSessionLocal() as session:
+            yield Database(session)
+else:
+    def get_database(db: Session = Depends(get_db)):
+        return Database(db)
@@ -0,0 +1,25 @@
+from .calculations import (
+    ADDITIONAL_COSTS_RATE,
+    SimulationArrays,
+    SimulationResult,
+    calculate_simulation,
+    calculate_simulations,
+)
+from .schedule import (
+    AMORTIZATION_SYSTEMS,
+    AmortizationSchedule,
+    amortization_schedule,
+    iter_schedule_csv,
+    iter_schedule_ndjson,
+    monthly_rate,
+)
+from .monte_carlo import (
+    COMMITMENT_THRESHOLD,
+    MonteCarloPaths,
+    MonteCarloSaturated,
+    MonteCarloTimeout,
+    run_monte_carlo,
+    shutdown_executor,
+    simulate_paths,
+    summarize,
+)
@@ -0,0 +1,49 @@
+from typing import NamedTuple
+
+import numpy as np
+
+# Custos adicionais (ITBI, escritura, registro etc.) como fração do valor do imóvel
+ADDITIONAL_COSTS_RATE = 0.15
+
+
+class SimulationResult(NamedTuple):
+    down_payment_value: float
+    financing_amount: float
+    additional_costs: float
+    monthly_savings: float
+
+
+class SimulationArrays(NamedTuple):
+    down_payment_value: np.ndarray
+    financing_amount: np.ndarray
+    additional_costs: np.ndarray
+    monthly_savings: np.ndarray
+
+
+def calculate_simulations(property_values, down_payment_percentages, contract_years) -> SimulationArrays:
+    """Calcula os valores derivados de N simulações em uma única passada NumPy.
+
+    As entradas são broadcast entre si, então escalares, vetores e grades
+    (ex.: property_value[:, None] x contract_years[None, :]) são aceitos.
+    """
+    property_values, down_payment_percentages, contract_years = np.broadcast_arrays(
+        np.asarray(property_values, dtype=np.float64),
+        np.asarray(down_payment_percentages, dtype=np.float64),
+        np.asarray(contract_years, dtype=np.int64),
+    )
+    months = contract_years * 12
+
+    down_payment_value = property_values * (down_payment_percentages / 100)
+    financing_amount = property_values - down_payment_value
+    additional_costs = property_values * ADDITIONAL_COSTS_RATE
+    # Com 0 anos de contrato, monthly_savings = additional_costs (evita divisão por zero)
+    monthly_savings = np.divide(
+        additional_costs, months, out=additional_costs.copy(), where=months > 0
+    )
+    return SimulationArrays(down_payment_value, financing_amount, additional_costs, monthly_savings)
+
+
+def calculate_simulation(property_value: float, down_payment_percentage: float, contract_years: int) -> SimulationResult:
+    """Versão escalar de `calculate_simulations`, para uma única simulação."""
+    arrays = calculate_simulations([property_value], [down_payment_percentage], [contract_years])
+    return SimulationResult(*(float(values[0]) for values in arrays))
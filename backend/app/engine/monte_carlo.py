@@ -0,0 +1,207 @@
+import asyncio
+import math
+import multiprocessing
+import os
+import secrets
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+# Comprometimento máximo de renda aceito pelos bancos para a parcela
+COMMITMENT_THRESHOLD = 0.30
+# Tamanho fixo do lote: a semente de cada lote depende só do índice, não do número de workers
+PATHS_PER_BATCH = 5000
+PERCENTILES = (5, 25, 50, 75, 95)
+
+MONTE_CARLO_WORKERS = int(os.getenv("MONTE_CARLO_WORKERS", "0")) or os.cpu_count()
+MONTE_CARLO_TIME_BUDGET_SECONDS = float(os.getenv("MONTE_CARLO_TIME_BUDGET_SECONDS", "10"))
+# Lotes aceitos (em execução + na fila) antes de responder 429
+MONTE_CARLO_MAX_PENDING_BATCHES = int(os.getenv("MONTE_CARLO_MAX_PENDING_BATCHES", "64"))
+# Sementes geradas pelo servidor cabem em um inteiro seguro do JavaScript (2**53 - 1)
+SEED_BITS = 53
+
+_executor: Optional[ProcessPoolExecutor] = None
+_pending_batches = 0
+_pending_lock = threading.Lock()
+
+
+class MonteCarloTimeout(Exception):
+    pass
+
+
+class MonteCarloSaturated(Exception):
+    pass
+
+
+class MonteCarloPaths(NamedTuple):
+    total_paid: np.ndarray
+    max_commitment_ratio: np.ndarray
+    negative_equity: np.ndarray
+    final_property_value: np.ndarray
+
+
+def simulate_paths(
+    financing_amount: float,
+    property_value: float,
+    contract_years: int,
+    monthly_income: float,
+    interest_rate: Tuple[float, float],
+    income_growth: Tuple[float, float],
+    property_appreciation: Tuple[float, float],
+    paths: int,
+    seed,
+) -> MonteCarloPaths:
+    """Simula `paths` trajetórias anuais de um financiamento com taxa pós-fixada.
+
+    Taxa de juros, crescimento de renda e valorização do imóvel são sorteados
+    por ano a partir de normais (média, desvio) em % ao ano. A cada ano a
+    parcela Price é recalculada sobre o saldo e o prazo restantes. O laço é
+    sobre os anos do contrato; todas as trajetórias avançam juntas.
+    """
+    contract_years = max(contract_years, 0)
+    rng = np.random.default_rng(seed)
+    shape = (paths, contract_years)
+    annual_rates = np.maximum(rng.normal(*interest_rate, size=shape), 0.0)
+    rates = (1 + annual_rates / 100) ** (1 / 12) - 1
+    growth = 1 + rng.normal(*income_growth, size=shape) / 100
+    appreciation = 1 + rng.normal(*property_appreciation, size=shape) / 100
+
+    # Renda do ano y reflete o crescimento acumulado até o ano anterior
+    income = monthly_income * np.cumprod(np.hstack([np.ones((paths, 1)), growth[:, :-1]]), axis=1)
+    property_values = property_value * np.cumprod(appreciation, axis=1)
+
+    balance = np.full(paths, float(financing_amount))
+    total_paid = np.zeros(paths)
+    max_commitment_ratio = np.zeros(paths)
+    negative_equity = np.zeros(paths, dtype=bool)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for year in range(contract_years):
+            rate = rates[:, year]
+            remaining = (contract_years - year) * 12
+            growth_12 = (1 + rate) ** 12
+            payment = np.where(rate > 0, balance * rate / (1 - (1 + rate) ** -remaining), balance / remaining)
+            balance = np.where(rate > 0, balance * growth_12 - payment * (growth_12 - 1) / rate, balance - payment * 12)
+            balance = np.maximum(balance, 0.0)
+
+            total_paid += payment * 12
+            np.maximum(max_commitment_ratio, payment / income[:, year], out=max_commitment_ratio)
+            negative_equity |= property_values[:, year] < balance
+
+    final_property_value = property_values[:, -1] if contract_years else np.full(paths, float(property_value))
+    return MonteCarloPaths(total_paid, max_commitment_ratio, negative_equity, final_property_value)
+
+
+def percentile_bands(values: np.ndarray) -> dict:
+    return {f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+
+
+def summarize(
+    result: MonteCarloPaths,
+    financing_amount: float,
+    down_payment_value: float,
+    additional_costs: float,
+) -> dict:
+    return {
+        "total_cost": percentile_bands(down_payment_value + additional_costs + result.total_paid),
+        "total_interest": percentile_bands(result.total_paid - financing_amount),
+        "final_property_value": percentile_bands(result.final_property_value),
+        "max_commitment_ratio": percentile_bands(result.max_commitment_ratio),
+        "commitment_breach_probability": float(np.mean(result.max_commitment_ratio > COMMITMENT_THRESHOLD)),
+        "negative_equity_probability": float(np.mean(result.negative_equity)),
+    }
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # Sem fork: o processo do servidor já tem threads (threadpool, pool de conexões)
+        # e um fork copiaria locks possivelmente ocupados por elas
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _executor = ProcessPoolExecutor(
+            max_workers=MONTE_CARLO_WORKERS, mp_context=multiprocessing.get_context(method)
+        )
+    return _executor
+
+
+def _reserve_batches(count: int):
+    global _pending_batches
+    with _pending_lock:
+        # Com o pool ocioso um pedido é sempre aceito, mesmo maior que o limite
+        if _pending_batches and _pending_batches + count > MONTE_CARLO_MAX_PENDING_BATCHES:
+            raise MonteCarloSaturated("Too many Monte Carlo simulations in progress, try again shortly")
+        _pending_batches += count
+
+
+def _release_batch(_future):
+    global _pending_batches
+    with _pending_lock:
+        _pending_batches -= 1
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def run_monte_carlo(
+    simulation,
+    monthly_income: float,
+    interest_rate: Tuple[float, float],
+    income_growth: Tuple[float, float],
+    property_appreciation: Tuple[float, float],
+    paths: int,
+    seed: Optional[int] = None,
+    time_budget: float = MONTE_CARLO_TIME_BUDGET_SECONDS,
+) -> dict:
+    """Distribui os lotes de trajetórias no pool de processos sem bloquear o event loop.
+
+    Levanta `MonteCarloSaturated` se o pool já tiver lotes demais pendentes e
+    `MonteCarloTimeout` se o conjunto não terminar dentro de `time_budget`.
+    """
+    if seed is None:
+        seed = secrets.randbits(SEED_BITS)
+    seed_sequence = np.random.SeedSequence(seed)
+    batch_count = math.ceil(paths / PATHS_PER_BATCH)
+    batch_sizes = [PATHS_PER_BATCH] * (batch_count - 1) + [paths - PATHS_PER_BATCH * (batch_count - 1)]
+
+    _reserve_batches(batch_count)
+    executor = get_executor()
+    futures = []
+    for size, batch_seed in zip(batch_sizes, seed_sequence.spawn(batch_count)):
+        future = executor.submit(
+            simulate_paths,
+            simulation.financing_amount,
+            simulation.property_value,
+            simulation.contract_years,
+            monthly_income,
+            interest_rate,
+            income_growth,
+            property_appreciation,
+            size,
+            batch_seed,
+        )
+        # O lote só deixa de contar quando o worker o libera (ou ele é cancelado na fila)
+        future.add_done_callback(_release_batch)
+        futures.append(future)
+    try:
+        batches = await asyncio.wait_for(
+            asyncio.gather(*(asyncio.wrap_future(future) for future in futures)), timeout=time_budget
+        )
+    except asyncio.TimeoutError:
+        # Cancela apenas os lotes ainda na fila: um lote já em execução em um worker não pode
+        # ser interrompido e segue ocupando o processo até terminar (e contando como pendente)
+        for future in futures:
+            future.cancel()
+        raise MonteCarloTimeout(f"Monte Carlo simulation exceeded its {time_budget:g}s time budget")
+
+    result = MonteCarloPaths(*(np.concatenate(columns) for columns in zip(*batches)))
+    return {
+        "paths": paths,
+        "seed": seed,
+        **summarize(result, simulation.financing_amount, simulation.down_payment_value, simulation.additional_costs),
+    }
@@ -0,0 +1,106 @@
+from typing import Iterator, NamedTuple
+
+import numpy as np
+
+AMORTIZATION_SYSTEMS = ("sac", "price")
+
+# Linhas formatadas por bloco ao transmitir a tabela (1 bloco = 10 anos de contrato)
+STREAM_CHUNK_ROWS = 120
+
+SCHEDULE_COLUMNS = (
+    "month",
+    "installment",
+    "interest",
+    "amortization",
+    "balance",
+    "cumulative_interest",
+)
+
+
+class AmortizationSchedule(NamedTuple):
+    month: np.ndarray
+    installment: np.ndarray
+    interest: np.ndarray
+    amortization: np.ndarray
+    balance: np.ndarray
+    cumulative_interest: np.ndarray
+
+
+def monthly_rate(annual_interest_rate: float) -> float:
+    """Converte a taxa anual efetiva (em %) para a taxa mensal equivalente."""
+    return (1 + annual_interest_rate / 100) ** (1 / 12) - 1
+
+
+def amortization_schedule(
+    principal: float,
+    annual_interest_rate: float,
+    months: int,
+    system: str = "price",
+) -> AmortizationSchedule:
+    """Gera a tabela mês a mês de um financiamento pelo sistema SAC ou Price.
+
+    Todas as colunas são calculadas com operações vetorizadas sobre o eixo
+    dos meses; não há laço em Python por parcela.
+    """
+    if system not in AMORTIZATION_SYSTEMS:
+        raise ValueError(f"Unknown amortization system: {system}")
+
+    rate = monthly_rate(annual_interest_rate)
+    if months <= 0:
+        empty = np.empty(0)
+        return AmortizationSchedule(np.empty(0, dtype=np.int64), empty, empty, empty, empty, empty)
+    month = np.arange(1, months + 1, dtype=np.int64)
+
+    if system == "sac":
+        # Amortização constante; juros incidem sobre o saldo do mês anterior
+        amortization = np.full(months, principal / months)
+        balance = principal - amortization * month
+        interest = (balance + amortization) * rate
+        installment = amortization + interest
+    else:
+        if rate == 0:
+            payment = principal / months
+            balance = principal - payment * month
+        else:
+            payment = principal * rate / (1 - (1 + rate) ** -months)
+            growth = (1 + rate) ** month
+            balance = principal * growth - payment * (growth - 1) / rate
+        previous_balance = np.concatenate(([principal], balance[:-1]))
+        interest = previous_balance * rate
+        installment = np.full(months, payment)
+        amortization = installment - interest
+
+    # Remove resíduos de ponto flutuante na última parcela
+    balance[-1] = 0.0
+
+    return AmortizationSchedule(
+        month=month,
+        installment=installment,
+        interest=interest,
+        amortization=amortization,
+        balance=balance,
+        cumulative_interest=np.cumsum(interest),
+    )
+
+
+def _iter_rows(schedule: AmortizationSchedule, row_template: str) -> Iterator[str]:
+    columns = np.column_stack([np.round(values, 2) for values in schedule[1:]])
+    months = schedule.month.tolist()
+    for start in range(0, len(months), STREAM_CHUNK_ROWS):
+        stop = start + STREAM_CHUNK_ROWS
+        yield "".join(
+            row_template % (month, *values)
+            for month, values in zip(months[start:stop], columns[start:stop].tolist())
+        )
+
+
+def iter_schedule_ndjson(schedule: AmortizationSchedule) -> Iterator[str]:
+    """Serializa a tabela como NDJSON, em blocos, sem materializar o corpo inteiro."""
+    fields = ",".join(f'"{name}":%.2f' for name in SCHEDULE_COLUMNS[1:])
+    return _iter_rows(schedule, '{"month":%d,' + fields + "}\n")
+
+
+def iter_schedule_csv(schedule: AmortizationSchedule) -> Iterator[str]:
+    """Serializa a tabela como CSV (com cabeçalho), em blocos."""
+    yield ",".join(SCHEDULE_COLUMNS) + "\n"
+    yield from _iter_rows(schedule, "%d" + ",%.2f" * (len(SCHEDULE_COLUMNS) - 1) + "\n")
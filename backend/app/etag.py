@@ -0,0 +1,22 @@
+from typing import Optional
+
+
+def weak_etag(*parts) -> str:
+    """ETag fraco a partir de valores que mudam sempre que a representação muda."""
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparação fraca de If-None-Match (RFC 9110, 13.1.2): ignora o prefixo W/."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
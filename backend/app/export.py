@@ -0,0 +1,100 @@
+import csv
+import io
+import os
+from datetime import datetime
+from typing import AsyncIterator, Sequence
+
+import orjson
+
+# Linhas buscadas por vez no cursor do servidor (yield_per) e escritas por bloco da resposta
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "5000"))
+
+
+async def iter_export_csv(columns: Sequence[str], partitions: AsyncIterator[Sequence]) -> AsyncIterator[bytes]:
+    """CSV com cabeçalho, um bloco por partição do cursor; datas em ISO 8601."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    timestamps = [i for i, column in enumerate(columns) if column in ("created_at", "updated_at")]
+
+    writer.writerow(columns)
+    yield buffer.getvalue().encode()
+    async for rows in partitions:
+        buffer.seek(0)
+        buffer.truncate()
+        for row in rows:
+            row = list(row)
+            for i in timestamps:
+                if row[i] is not None:
+                    row[i] = row[i].isoformat()
+            writer.writerow(row)
+        yield buffer.getvalue().encode()
+
+
+async def iter_export_ndjson(columns: Sequence[str], partitions: AsyncIterator[Sequence]) -> AsyncIterator[bytes]:
+    """Um objeto JSON por linha, no mesmo formato de `GET /api/simulations`."""
+    async for rows in partitions:
+        yield b"".join(
+            orjson.dumps(dict(zip(columns, row)), option=orjson.OPT_APPEND_NEWLINE) for row in rows
+        )
+
+
+class _ChunkSink:
+    """Arquivo só de escrita que acumula os bytes até o próximo `drain()`."""
+
+    closed = False
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def writable(self) -> bool:
+        return True
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _arrow_type(pa, python_type):
+    if python_type is datetime:
+        return pa.timestamp("us", tz="UTC")
+    return {int: pa.int64(), float: pa.float64(), str: pa.string()}[python_type]
+
+
+async def iter_export_parquet(
+    columns: Sequence[str], python_types: Sequence[type], partitions: AsyncIterator[Sequence]
+) -> AsyncIterator[bytes]:
+    """Parquet com um row group por partição; cada bloco é enviado assim que é escrito."""
+    # Import tardio: o pyarrow só é carregado por quem exporta Parquet, fora do cold start
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(column, _arrow_type(pa, python_type)) for column, python_type in zip(columns, python_types)])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema)
+    try:
+        async for rows in partitions:
+            values = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(values, schema)], schema=schema
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    # O rodapé (metadados do arquivo) só é escrito no close
+    yield sink.drain()
@@ -0,0 +1,61 @@
+import codecs
+import csv
+import os
+from itertools import islice
+from typing import BinaryIO, Iterator, List, NamedTuple, Tuple
+
+import orjson
+from pydantic import ValidationError
+
+from app import schemas
+
+# Linhas validadas e gravadas por vez; a memória do import não cresce com o tamanho do arquivo
+IMPORT_CHUNK_ROWS = int(os.getenv("IMPORT_CHUNK_ROWS", "5000"))
+# Erros devolvidos na resposta; os demais só entram na contagem de `failed`
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "1000"))
+
+
+class ImportChunk(NamedTuple):
+    simulations: List[schemas.SimulationCreate]
+    # (linha do arquivo, erros no formato do pydantic)
+    errors: List[Tuple[int, list]]
+
+
+def iter_csv_records(file: BinaryIO) -> Iterator[Tuple[int, dict]]:
+    """Registros de um CSV com cabeçalho, com o número da linha em que cada um termina.
+
+    Colunas extras são ignoradas pela validação, então o CSV de
+    `GET /api/simulations/export` pode ser reimportado como está.
+    """
+    # codecs em vez de TextIOWrapper: o SpooledTemporaryFile do upload não implementa readable() no Python 3.9
+    reader = csv.DictReader(codecs.getreader("utf-8-sig")(file))
+    for record in reader:
+        # Célula vazia vale como ausente (o export escreve None assim)
+        yield reader.line_num, {key: value if value != "" else None for key, value in record.items()}
+
+
+def iter_ndjson_records(file: BinaryIO) -> Iterator[Tuple[int, object]]:
+    """Um objeto JSON por linha; linhas em branco são ignoradas."""
+    for line_number, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, orjson.loads(line)
+        except orjson.JSONDecodeError:
+            # Repassado como está: a validação do schema reporta o erro na linha certa
+            yield line_number, line
+
+
+def iter_import_chunks(records: Iterator[Tuple[int, object]], chunk_rows: int) -> Iterator[ImportChunk]:
+    """Valida os registros em blocos de `chunk_rows` com as mesmas regras de `POST /api/simulations`."""
+    while True:
+        batch = list(islice(records, chunk_rows))
+        if not batch:
+            return
+        chunk = ImportChunk([], [])
+        for line_number, record in batch:
+            try:
+                chunk.simulations.append(schemas.SimulationCreate.parse_obj(record))
+            except ValidationError as e:
+                chunk.errors.append((line_number, e.errors()))
+        yield chunk
@@ -1,24 +1,96 @@
+import time
+
+# Marcado antes dos demais imports: a importação faz parte do cold start
+IMPORT_STARTED = time.perf_counter()
+
+import os
+import random
+import uuid
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Depends, HTTPException, status, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from typing import List, Union
-import time
 
 from app import models, schemas, crud
-from app.database import engine, get_db, Base
-from app.auth import get_current_user
-from app.core.logging import logger
-from app.routers import auth, simulations
+from app.database import DB_SKIP_DDL, engine, get_db, get_pool_status, Base
+from app.auth import get_current_user, is_admin_token
+from app.core.logging import (
+    LOG_SAMPLE_2XX_RATE,
+    LOG_SLOW_REQUEST_MS,
+    access_logger,
+    logger,
+    logging_stats,
+    request_id_var,
+    route_template,
+    setup_logging,
+    shutdown_logging,
+)
+from app.core.metrics import (
+    REQUEST_DURATION,
+    REQUEST_QUERIES,
+    REQUESTS_IN_FLIGHT,
+    collect,
+    exporter as metrics_exporter,
+    render,
+)
+from app.core.profiler import profile_name, profiler
+from app.core.sql_profiler import RequestStats, compact_statement, request_stats_var
+from app.core.response_cache import cache_stats, simulation_list_cache
+from app.core.hashing import HashingPoolSaturated, hasher
+from app.engine import shutdown_executor
+from app.routers import admin, auth, simulations
 
-# Criar tabelas no banco de dados
-Base.metadata.create_all(bind=engine)
+# Tempo máximo esperado entre o início da importação e a aplicação pronta para atender
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "1"))
+# Modo de depuração: respostas levam o cabeçalho Server-Timing com o tempo de banco
+DEBUG = os.getenv("DEBUG", "false").lower() in ("1", "true", "yes")
+
+startup_timings = {}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup_started = time.perf_counter()
+    setup_logging()
+    if metrics_exporter is not None:
+        metrics_exporter.start()
+    # Criar tabelas no banco de dados (desenvolvimento); com DB_SKIP_DDL o boot não abre conexão
+    if not DB_SKIP_DDL:
+        Base.metadata.create_all(bind=engine)
+
+    ready = time.perf_counter()
+    startup_timings.update({
+        "import_seconds": startup_started - IMPORT_STARTED,
+        "startup_seconds": ready - startup_started,
+        "total_seconds": ready - IMPORT_STARTED,
+        "budget_seconds": STARTUP_BUDGET_SECONDS,
+        "ddl": "skipped" if DB_SKIP_DDL else "create_all",
+    })
+    message = f"Startup completed in {startup_timings['total_seconds']:.3f}s (budget {STARTUP_BUDGET_SECONDS:g}s)"
+    if startup_timings["total_seconds"] > STARTUP_BUDGET_SECONDS:
+        logger.warning(message + " - over budget")
+    else:
+        logger.info(message)
+
+    yield
+
+    shutdown_executor()
+    hasher.shutdown()
+    await simulation_list_cache.close()
+    if metrics_exporter is not None:
+        metrics_exporter.stop()
+    shutdown_logging()
 
 app = FastAPI(
     title="aMora API",
     description="API para o simulador de compra de imóveis aMora",
-    version="1.0.0"
+    version="1.0.0",
+    debug=DEBUG,
+    lifespan=lifespan,
 )
 
 # Configuração CORS
@@ -28,37 +100,111 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Request-ID", "Server-Timing", "X-Profile-Name"],
 )
 
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(simulations.router, prefix="/api/simulations", tags=["simulations"])
+app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
+
+def log_access(request: Request, request_id: str, status_code: int, duration_ms: float, stats: RequestStats):
+    # Só enfileira o registro; formatação e escrita ficam com a thread do QueueListener.
+    # Requisições 2xx rápidas são amostradas; erros e lentas sempre entram.
+    if (
+        200 <= status_code < 300
+        and duration_ms < LOG_SLOW_REQUEST_MS
+        and random.random() >= LOG_SAMPLE_2XX_RATE
+    ):
+        return
+    extra = {
+        "method": request.method,
+        "path": route_template(request.scope) or request.url.path,
+        "status": status_code,
+        "duration_ms": round(duration_ms, 3),
+        "request_id": request_id,
+        "user_id": getattr(request.state, "user_id", None),
+        "db_queries": stats.queries,
+        "db_ms": round(stats.db_seconds * 1000, 3),
+        "db_slowest_ms": round(stats.slowest_seconds * 1000, 3),
+    }
+    # Em requisições lentas, o comando mais lento ajuda a achar a causa
+    if duration_ms >= LOG_SLOW_REQUEST_MS and stats.slowest_statement is not None:
+        extra["db_slowest_statement"] = compact_statement(stats.slowest_statement)
+    access_logger.info("request", extra=extra)
 
-# Middleware for request logging
+def record_metrics(request: Request, status_code: int, duration: float, stats: RequestStats):
+    # Rotas sem template (404, redirects) entram juntas: o caminho bruto explodiria a cardinalidade
+    route = route_template(request.scope) or "<unmatched>"
+    REQUEST_DURATION.observe(duration, (request.method, route, str(status_code)))
+    REQUEST_QUERIES.observe(stats.queries, (route,))
+
+def start_profile(request: Request, request_id: str):
+    # X-Profile força o perfil de uma requisição específica, só com o token de administração
+    forced = "x-profile" in request.headers and is_admin_token(request.headers.get("x-admin-token"))
+    if not forced and not profiler.wanted(request.scope):
+        return None
+    return profiler.start(profile_name(request.method, request.url.path, request_id))
+
+# Middleware for request logging and metrics
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    
-    logger.info(
-        f"Method: {request.method} Path: {request.url.path} "
-        f"Status: {response.status_code} Duration: {process_time:.2f}s"
-    )
+    start_time = time.perf_counter()
+    # Reaproveita o id do proxy/cliente, para correlacionar os logs das duas pontas
+    request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+    token = request_id_var.set(request_id)
+    stats = RequestStats()
+    stats_token = request_stats_var.set(stats)
+    in_flight = (request.method,)
+    REQUESTS_IN_FLIGHT.inc(labels=in_flight)
+    # Desligado, o profiler custa só estas duas verificações
+    profile = start_profile(request, request_id) if profiler.enabled or "x-profile" in request.headers else None
+    try:
+        response = await call_next(request)
+    except Exception:
+        # Tratada pelo handler de Exception, por fora deste middleware: a resposta será 500
+        duration = time.perf_counter() - start_time
+        log_access(request, request_id, 500, duration * 1000, stats)
+        record_metrics(request, 500, duration, stats)
+        raise
+    finally:
+        if profile is not None:
+            profile.stop()
+        REQUESTS_IN_FLIGHT.dec(labels=in_flight)
+        request_stats_var.reset(stats_token)
+        request_id_var.reset(token)
+    # Respostas em streaming (ex.: /export) ainda consultam o banco depois deste ponto;
+    # a latência e a contagem de consultas cobrem até o início do corpo
+    duration = time.perf_counter() - start_time
+    log_access(request, request_id, response.status_code, duration * 1000, stats)
+    record_metrics(request, response.status_code, duration, stats)
+    response.headers["X-Request-ID"] = request_id
+    if DEBUG:
+        response.headers["Server-Timing"] = stats.server_timing()
+    if profile is not None:
+        response.headers["X-Profile-Name"] = f"{profile.name}.folded"
     return response
 
 # Global exception handler
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
-    logger.error(f"HTTP Exception: {exc.detail}")
+    logger.error("HTTP exception", extra={"status": exc.status_code, "detail": exc.detail})
     return JSONResponse(
         status_code=exc.status_code,
         content={"detail": exc.detail},
     )
 
+@app.exception_handler(HashingPoolSaturated)
+async def hashing_pool_saturated_handler(request: Request, exc: HashingPoolSaturated):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"},
+    )
+
 @app.exception_handler(SQLAlchemyError)
 async def sqlalchemy_exception_handler(request: Request, exc: SQLAlchemyError):
-    logger.error(f"Database Error: {str(exc)}")
+    logger.error("Database error", exc_info=exc)
     return JSONResponse(
         status_code=500,
         content={"detail": "An error occurred while accessing the database"},
@@ -66,7 +212,7 @@ async def sqlalchemy_exception_handler(request: Request, exc: SQLAlchemyError):
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
-    logger.error(f"Unexpected Error: {str(exc)}")
+    logger.error("Unexpected error", exc_info=exc)
     return JSONResponse(
         status_code=500,
         content={"detail": "An unexpected error occurred"},
@@ -75,3 +221,29 @@ async def general_exception_handler(request: Request, exc: Exception):
 @app.get("/api/health")
 async def health_check():
     return {"status": "healthy"}
+
+@app.get("/api/health/hashing")
+async def hashing_health():
+    return hasher.stats()
+
+@app.get("/api/health/pool")
+async def pool_health():
+    return get_pool_status()
+
+@app.get("/api/health/cache")
+async def cache_health():
+    return cache_stats()
+
+@app.get("/api/health/logging")
+async def logging_health():
+    return logging_stats()
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    # Com METRICS_MULTIPROC_DIR, soma os snapshots de todos os workers (leitura de arquivos)
+    families = await run_in_threadpool(collect) if metrics_exporter is not None else collect()
+    return PlainTextResponse(render(families), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/api/health/startup")
+async def startup_health():
+    return startup_timings
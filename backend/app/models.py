@@ -1,9 +1,19 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, Float, DateTime, Text
+from sqlalchemy import Column, ForeignKey, Index, Integer, String, Float, DateTime, Text
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 from app.database import Base
 
+# No SQLite datas são texto e CURRENT_TIMESTAMP grava segundos sem fração. Parâmetros
+# tipados com a coluna (ex.: cursor keyset em crud.get_simulations) precisam ser escritos
+# no mesmo formato, senão '...:46' < '...:46.000000' e a comparação fica errada.
+# Não afeta o Postgres.
+Timestamp = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite",
+)
+
 class User(Base):
     __tablename__ = "users"
 
@@ -13,9 +23,14 @@ class User(Base):
     password_hash = Column(String)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     last_login = Column(DateTime(timezone=True), nullable=True)
+    # Incrementada a cada escrita nas simulações do usuário; base do ETag da listagem
+    simulations_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     simulations = relationship("Simulation", back_populates="user")
 
+    # Defaults do servidor (created_at) lidos via RETURNING no próprio INSERT, sem SELECT extra
+    __mapper_args__ = {"eager_defaults": True}
+
 class Simulation(Base):
     __tablename__ = "simulations"
 
@@ -30,7 +45,15 @@ class Simulation(Base):
     monthly_savings = Column(Float, nullable=False)
     name = Column(String, nullable=True)
     notes = Column(Text, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
+    updated_at = Column(Timestamp, server_default=func.now(), onupdate=func.now())
 
     user = relationship("User", back_populates="simulations")
+
+    # Defaults do servidor (created_at, updated_at) lidos via RETURNING no INSERT/UPDATE
+    __mapper_args__ = {"eager_defaults": True}
+
+    __table_args__ = (
+        # Listagem por usuário, mais recentes primeiro (paginação keyset)
+        Index("ix_simulations_user_id_created_at_id", user_id, created_at.desc(), id.desc()),
+    )
@@ -0,0 +1,19 @@
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+
+def encode_cursor(created_at: datetime, simulation_id: int) -> str:
+    """Cursor opaco para paginação keyset sobre (created_at, id)."""
+    payload = json.dumps([created_at.isoformat(), simulation_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, simulation_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(simulation_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import FileResponse
+
+from app import schemas
+from app.auth import require_admin
+from app.core.profiler import profiler
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+def profiler_status() -> schemas.ProfilerStatus:
+    return schemas.ProfilerStatus(**profiler.status(), profiles=profiler.profiles())
+
+@router.get("/profiler", response_model=schemas.ProfilerStatus)
+async def read_profiler():
+    return profiler_status()
+
+@router.put("/profiler", response_model=schemas.ProfilerStatus)
+async def configure_profiler(config: schemas.ProfilerConfig, request: Request):
+    # Só caminhos que existem: um erro de digitação deixaria o profiler ligado sem perfilar nada
+    known = {getattr(route, "path", None) for route in request.app.routes}
+    unknown = [route for route in config.routes if route not in known]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown routes: {', '.join(unknown)}",
+        )
+    profiler.configure(config.enabled, config.sample_rate, config.routes)
+    return profiler_status()
+
+@router.get("/profiler/profiles/{name}")
+async def read_profile(name: str):
+    path = profiler.profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain; charset=utf-8", filename=name)
@@ -1,55 +1,74 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
 
 from app import crud, schemas
-from app.database import get_db
-from app.auth import get_current_user
+from app.database import Database, get_database
+from app.auth import CurrentUser, get_current_user
+from app.core.hashing import hasher
 
 router = APIRouter()
 
+# As rotas são assíncronas para aguardar o bcrypt no pool de hashing sem ocupar uma thread
 @router.post("/register", response_model=schemas.User)
-def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user_by_username = crud.get_user_by_username(db, username=user.username)
+async def register(user: schemas.UserCreate, db: Database = Depends(get_database)):
+    db_user_by_username = await db.run(crud.get_user_by_username, username=user.username)
     if db_user_by_username:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already registered"
         )
-    db_user_by_email = crud.get_user_by_email(db, email=user.email)
+    db_user_by_email = await db.run(crud.get_user_by_email, email=user.email)
     if db_user_by_email:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email já registrado"
         )
-    return crud.create_user(db=db, user=user)
+    hashed_password = await hasher.hash(user.password)
+    return await db.run(crud.create_user, user=user, hashed_password=hashed_password)
 
 @router.post("/login", response_model=schemas.Token)
-def login(user_credentials: schemas.UserLogin, db: Session = Depends(get_db)):
-    user = crud.authenticate_user(db, user_credentials.email, user_credentials.password)
-    if not user:
+async def login(user_credentials: schemas.UserLogin, db: Database = Depends(get_database)):
+    user = await db.run(crud.get_user_by_email, user_credentials.email)
+    if not user or not await hasher.verify(user_credentials.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="O email e/ou a senha estão incorretos",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = crud.create_access_token(data={"sub": user.email})
+    email = user.email
+    await db.run(crud.record_login, user)
+    access_token = crud.create_access_token(data={"sub": email})
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me", response_model=schemas.User)
-def get_current_user_info(current_user: schemas.User = Depends(get_current_user)):
+async def get_current_user_info(current_user: CurrentUser = Depends(get_current_user)):
     return current_user
 
 @router.put("/me", response_model=schemas.User)
-def update_user_profile(
+async def update_user_profile(
     user_update: schemas.UserUpdate,
-    current_user: schemas.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Database = Depends(get_database)
 ):
+    user = await db.run(crud.get_user, current_user.id)
+    if not await hasher.verify(user_update.current_password, user.password_hash):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Current password is incorrect"
+        )
+    new_password_hash = None
+    if user_update.new_password:
+        new_password_hash = await hasher.hash(user_update.new_password)
     try:
-        updated_user = crud.update_user(db, current_user, user_update)
+        updated_user = await db.run(
+            crud.update_user,
+            user,
+            user_update,
+            new_password_hash=new_password_hash,
+            password_verified=True,
+        )
         return updated_user
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
-        ) 
\ No newline at end of file
+        )
@@ -1,61 +1,314 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+import csv
+
+import numpy as np
+import orjson
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Query, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from typing import List, Optional
 
 from app import crud, schemas
-from app.database import get_db
-from app.auth import get_current_user
+from app.engine import (
+    MonteCarloSaturated,
+    MonteCarloTimeout,
+    amortization_schedule,
+    calculate_simulation,
+    calculate_simulations,
+    iter_schedule_csv,
+    iter_schedule_ndjson,
+    run_monte_carlo,
+)
+from app.core.response_cache import simulation_list_cache
+from app.database import Database, get_database
+from app.etag import etag_matches, weak_etag
+from app.export import EXPORT_CHUNK_ROWS, iter_export_csv, iter_export_ndjson, iter_export_parquet
+from app.importer import (
+    IMPORT_CHUNK_ROWS,
+    IMPORT_MAX_ERRORS,
+    iter_csv_records,
+    iter_import_chunks,
+    iter_ndjson_records,
+)
+from app.pagination import decode_cursor, encode_cursor
+from app.auth import CurrentUser, get_current_user
 
 router = APIRouter()
 
+SIMULATION_FIELDS = list(schemas.Simulation.__fields__)
+
+# Respostas dependem do token: um cache compartilhado não pode servir a de um usuário a outro
+VARY = {"Vary": "Authorization"}
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, **VARY})
+
+# A versão na chave garante que uma página guardada antes de uma escrita nunca é servida
+# depois dela, mesmo com um cache por processo que não viu a invalidação
+def list_cache_field(version: int, skip: int, limit: int, cursor: Optional[str]) -> str:
+    return f"{version}:{skip}:{limit}:{cursor or ''}"
+
+def list_response(body: bytes, etag: str, next_cursor: str) -> Response:
+    headers = {"ETag": etag, **VARY}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return Response(body, media_type="application/json", headers=headers)
+
 @router.post("/", response_model=schemas.Simulation)
-def create_simulation(
+async def create_simulation(
     simulation: schemas.SimulationCreate,
-    db: Session = Depends(get_db),
-    current_user: schemas.User = Depends(get_current_user)
+    db: Database = Depends(get_database),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    db_simulation = await db.run(crud.create_simulation, simulation=simulation, user_id=current_user.id)
+    await simulation_list_cache.invalidate(current_user.id)
+    return db_simulation
+
+# Cálculo sem persistência: não depende de sessão de banco nem de autenticação
+@router.post("/preview", response_model=schemas.SimulationPreview)
+async def preview_simulation(simulation: schemas.SimulationBase):
+    result = calculate_simulation(
+        simulation.property_value,
+        simulation.down_payment_percentage,
+        simulation.contract_years,
+    )
+    return {**simulation.dict(), **result._asdict()}
+
+# Grade de sensibilidade avaliada por broadcasting; resposta colunar serializada direto dos arrays
+@router.post("/sweep", response_model=schemas.SimulationSweepResult, response_class=ORJSONResponse)
+async def sweep_simulations(sweep: schemas.SimulationSweep):
+    property_values = np.linspace(sweep.property_value.start, sweep.property_value.stop, sweep.property_value.steps)
+    axis_values = np.linspace(sweep.axis_range.start, sweep.axis_range.stop, sweep.axis_range.steps)
+
+    if sweep.axis == schemas.SweepAxis.contract_years:
+        # Prazos são inteiros: arredondar pode repetir valores (ex.: 10..12 em 5 passos), então
+        # remove repetidos mantendo a ordem; o eixo devolvido é o que foi de fato calculado
+        axis_values = np.rint(axis_values).astype(np.int64)
+        _, first = np.unique(axis_values, return_index=True)
+        axis_values = axis_values[np.sort(first)]
+        down_payment_percentages, contract_years = sweep.down_payment_percentage, axis_values
+        grid = calculate_simulations(property_values[:, None], down_payment_percentages, contract_years[None, :])
+    else:
+        down_payment_percentages, contract_years = axis_values, sweep.contract_years
+        grid = calculate_simulations(property_values[:, None], down_payment_percentages[None, :], contract_years)
+
+    return ORJSONResponse({
+        "property_value": property_values,
+        "down_payment_percentage": down_payment_percentages,
+        "contract_years": contract_years,
+        **grid._asdict(),
+    })
+
+@router.post("/batch", response_model=schemas.SimulationBatchResult)
+async def create_simulations_batch(
+    batch: schemas.SimulationBatchCreate,
+    db: Database = Depends(get_database),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    ids = await db.run(crud.create_simulations_batch, simulations=batch.simulations, user_id=current_user.id)
+    await simulation_list_cache.invalidate(current_user.id)
+    return {"ids": ids}
+
+@router.post("/import", response_model=schemas.SimulationImportResult)
+async def import_simulations(
+    file: UploadFile = File(...),
+    format: schemas.ImportFormat = schemas.ImportFormat.csv,
+    db: Database = Depends(get_database),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
-    return crud.create_simulation(db=db, simulation=simulation, user_id=current_user.id)
+    # O upload já está em um arquivo temporário; é lido e validado um bloco por vez no threadpool
+    records = iter_ndjson_records(file.file) if format == schemas.ImportFormat.ndjson else iter_csv_records(file.file)
+    chunks = iter_import_chunks(records, IMPORT_CHUNK_ROWS)
+    imported, failed, errors = 0, 0, []
+    while True:
+        try:
+            chunk = await run_in_threadpool(next, chunks, None)
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid {format.value} file: {e}")
+        if chunk is None:
+            break
+        failed += len(chunk.errors)
+        errors.extend(
+            {"line": line, "errors": row_errors}
+            for line, row_errors in chunk.errors[:IMPORT_MAX_ERRORS - len(errors)]
+        )
+        if chunk.simulations:
+            # COPY FROM STDIN no Postgres (psycopg2); executemany nos demais drivers
+            imported += await db.run(crud.import_simulations, simulations=chunk.simulations, user_id=current_user.id)
+    # Uma transação para o arquivo inteiro: uma falha no meio não deixa metade importada
+    await db.commit()
+    if imported:
+        await simulation_list_cache.invalidate(current_user.id)
+    return {"imported": imported, "failed": failed, "errors": errors}
 
-@router.get("/", response_model=List[schemas.Simulation])
-def read_simulations(
+# response_model documenta o formato; a resposta é montada direto com orjson (ver abaixo)
+@router.get("/", response_model=List[schemas.Simulation], response_class=ORJSONResponse)
+async def read_simulations(
     skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: schemas.User = Depends(get_current_user)
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: Database = Depends(get_database),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
-    return crud.get_simulations(db, user_id=current_user.id, skip=skip, limit=limit)
+    after = None
+    if cursor is not None:
+        # O cursor substitui o OFFSET; combinar os dois voltaria a varrer linhas descartadas
+        if skip:
+            raise HTTPException(status_code=400, detail="skip cannot be combined with cursor")
+        try:
+            after = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    if if_none_match or simulation_list_cache.enabled:
+        # Polling: a versão da lista (busca por chave primária em users) decide o 304 e
+        # a entrada do cache antes de ler ou serializar a página
+        version = await db.run(crud.get_simulations_version, user_id=current_user.id)
+        etag = weak_etag(current_user.id, version)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        cached = await simulation_list_cache.get(current_user.id, list_cache_field(version, skip, limit, cursor))
+        if cached is not None:
+            next_cursor, body = cached.split(b"\n", 1)
+            return list_response(body, etag, next_cursor.decode())
+
+    # Uma linha extra indica se existe próxima página
+    version, rows = await db.run(
+        crud.get_simulation_page, user_id=current_user.id, skip=skip, limit=limit + 1, after=after
+    )
+    next_cursor = ""
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    # Tuplas do banco serializadas pelo orjson, sem instanciar um schemas.Simulation por linha;
+    # as colunas são as do schema (o zip descarta a versão no fim de cada linha) e os valores
+    # já vêm tipados pelo SQLAlchemy
+    body = orjson.dumps([dict(zip(SIMULATION_FIELDS, row)) for row in rows])
+    # Chave pela versão lida junto com a página: uma entrada nunca é mais antiga que a sua versão
+    await simulation_list_cache.set(
+        current_user.id, list_cache_field(version, skip, limit, cursor), next_cursor.encode() + b"\n" + body
+    )
+    return list_response(body, weak_etag(current_user.id, version), next_cursor)
+
+# Declarada antes de /{simulation_id} para que "export" não seja lido como id
+@router.get("/export", response_class=StreamingResponse)
+async def export_simulations(
+    format: schemas.ExportFormat = schemas.ExportFormat.csv,
+    db: Database = Depends(get_database),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    columns = [column.key for column in crud.SIMULATION_COLUMNS]
+    partitions = db.stream(crud.simulation_export_query(current_user.id), EXPORT_CHUNK_ROWS)
+    if format == schemas.ExportFormat.parquet:
+        python_types = [column.type.python_type for column in crud.SIMULATION_COLUMNS]
+        body, media_type = iter_export_parquet(columns, python_types, partitions), "application/vnd.apache.parquet"
+    elif format == schemas.ExportFormat.ndjson:
+        body, media_type = iter_export_ndjson(columns, partitions), "application/x-ndjson"
+    else:
+        body, media_type = iter_export_csv(columns, partitions), "text/csv"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="simulations.{format.value}"'},
+    )
 
 @router.get("/{simulation_id}", response_model=schemas.Simulation)
-def read_simulation(
+async def read_simulation(
     simulation_id: int,
-    db: Session = Depends(get_db),
-    current_user: schemas.User = Depends(get_current_user)
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Database = Depends(get_database),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
-    simulation = crud.get_simulation(db, simulation_id=simulation_id)
-    if simulation is None or simulation.user_id != current_user.id:
+    found = await db.run(crud.get_simulation_with_version, simulation_id=simulation_id, user_id=current_user.id)
+    if found is None:
         raise HTTPException(status_code=404, detail="Simulation not found")
+    simulation, version = found
+    # updated_at tem resolução de segundos no SQLite; a versão da lista cobre duas edições no mesmo segundo
+    etag = weak_etag(simulation.id, int(simulation.updated_at.timestamp() * 1_000_000), version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    response.headers.update(VARY)
     return simulation
 
+@router.get("/{simulation_id}/schedule", response_class=StreamingResponse)
+async def read_simulation_schedule(
+    simulation_id: int,
+    annual_interest_rate: float = Query(..., ge=0, le=100),
+    system: schemas.AmortizationSystem = schemas.AmortizationSystem.price,
+    format: schemas.ScheduleFormat = schemas.ScheduleFormat.ndjson,
+    db: Database = Depends(get_database),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    simulation = await db.run(crud.get_simulation, simulation_id=simulation_id, user_id=current_user.id)
+    if simulation is None:
+        raise HTTPException(status_code=404, detail="Simulation not found")
+
+    schedule = amortization_schedule(
+        simulation.financing_amount,
+        annual_interest_rate,
+        simulation.contract_years * 12,
+        system=system.value,
+    )
+    if format == schemas.ScheduleFormat.csv:
+        return StreamingResponse(
+            iter_schedule_csv(schedule),
+            media_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="simulation-{simulation_id}-schedule.csv"'},
+        )
+    return StreamingResponse(iter_schedule_ndjson(schedule), media_type="application/x-ndjson")
+
+@router.post("/{simulation_id}/monte-carlo", response_model=schemas.MonteCarloResult)
+async def run_simulation_monte_carlo(
+    simulation_id: int,
+    params: schemas.MonteCarloRequest,
+    db: Database = Depends(get_database),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    simulation = await db.run(crud.get_simulation, simulation_id=simulation_id, user_id=current_user.id)
+    if simulation is None:
+        raise HTTPException(status_code=404, detail="Simulation not found")
+    try:
+        return await run_monte_carlo(
+            simulation,
+            monthly_income=params.monthly_income,
+            interest_rate=(params.interest_rate.mean, params.interest_rate.std),
+            income_growth=(params.income_growth.mean, params.income_growth.std),
+            property_appreciation=(params.property_appreciation.mean, params.property_appreciation.std),
+            paths=params.paths,
+            seed=params.seed,
+        )
+    except MonteCarloSaturated as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+    except MonteCarloTimeout as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
 @router.put("/{simulation_id}", response_model=schemas.Simulation)
-def update_simulation(
+async def update_simulation(
     simulation_id: int,
     simulation: schemas.SimulationUpdate,
-    db: Session = Depends(get_db),
-    current_user: schemas.User = Depends(get_current_user)
+    db: Database = Depends(get_database),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
-    db_simulation = crud.get_simulation(db, simulation_id=simulation_id)
-    if db_simulation is None or db_simulation.user_id != current_user.id:
+    # Checagem do dono, gravação e leitura do resultado em um único UPDATE ... RETURNING
+    db_simulation = await db.run(
+        crud.update_simulation, simulation_id=simulation_id, simulation=simulation, user_id=current_user.id
+    )
+    if db_simulation is None:
         raise HTTPException(status_code=404, detail="Simulation not found")
-    return crud.update_simulation(db=db, simulation_id=simulation_id, simulation=simulation)
+    await simulation_list_cache.invalidate(current_user.id)
+    return db_simulation
 
 @router.delete("/{simulation_id}")
-def delete_simulation(
+async def delete_simulation(
     simulation_id: int,
-    db: Session = Depends(get_db),
-    current_user: schemas.User = Depends(get_current_user)
+    db: Database = Depends(get_database),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
-    db_simulation = crud.get_simulation(db, simulation_id=simulation_id)
-    if db_simulation is None or db_simulation.user_id != current_user.id:
+    deleted_id = await db.run(crud.delete_simulation, simulation_id=simulation_id, user_id=current_user.id)
+    if deleted_id is None:
         raise HTTPException(status_code=404, detail="Simulation not found")
-    crud.delete_simulation(db=db, simulation_id=simulation_id)
+    await simulation_list_cache.invalidate(current_user.id)
     return {"detail": "Simulation deleted successfully"} 
\ No newline at end of file
@@ -1,6 +1,7 @@
-from pydantic import BaseModel, EmailStr, validator
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, confloat, conint, conlist, root_validator, validator
+from typing import Optional, List, Union
 from datetime import datetime
+from enum import Enum
 
 # User schemas
 class UserBase(BaseModel):
@@ -67,12 +68,47 @@ class SimulationBase(BaseModel):
             raise ValueError('Down payment percentage must be between 0 and 100')
         return v
 
+    @validator('contract_years')
+    def contract_years_must_not_be_negative(cls, v):
+        if v < 0:
+            raise ValueError('Contract years must not be negative')
+        return v
+
 class SimulationCreate(SimulationBase):
     pass
 
 class SimulationUpdate(SimulationBase):
     pass
 
+class SimulationPreview(SimulationBase):
+    down_payment_value: float
+    financing_amount: float
+    additional_costs: float
+    monthly_savings: float
+
+MAX_BATCH_SIZE = 10000
+
+class SimulationBatchCreate(BaseModel):
+    simulations: conlist(SimulationCreate, min_items=1, max_items=MAX_BATCH_SIZE)
+
+class SimulationBatchResult(BaseModel):
+    ids: List[int]
+
+class ImportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+class SimulationImportError(BaseModel):
+    # Linha do arquivo (no CSV, contando o cabeçalho)
+    line: int
+    errors: List[dict]
+
+class SimulationImportResult(BaseModel):
+    imported: int
+    failed: int
+    # Limitada a IMPORT_MAX_ERRORS entradas; `failed` conta todas
+    errors: List[SimulationImportError]
+
 class Simulation(SimulationBase):
     id: int
     user_id: int
@@ -85,3 +121,134 @@ class Simulation(SimulationBase):
 
     class Config:
         orm_mode = True
+
+# Amortization schedule
+class AmortizationSystem(str, Enum):
+    sac = "sac"
+    price = "price"
+
+class ScheduleFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+class ExportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+    parquet = "parquet"
+
+# Sensitivity sweep
+MAX_SWEEP_STEPS = 200
+
+class SweepRange(BaseModel):
+    start: float
+    stop: float
+    steps: conint(ge=1, le=MAX_SWEEP_STEPS)
+
+class SweepAxis(str, Enum):
+    down_payment_percentage = "down_payment_percentage"
+    contract_years = "contract_years"
+
+class SimulationSweep(BaseModel):
+    property_value: SweepRange
+    axis: SweepAxis = SweepAxis.down_payment_percentage
+    axis_range: SweepRange
+    # Valor fixo do parâmetro que não está sendo variado
+    down_payment_percentage: Optional[float] = None
+    contract_years: Optional[int] = None
+
+    @validator('property_value')
+    def property_value_must_be_positive(cls, v):
+        if v.start <= 0 or v.stop <= 0:
+            raise ValueError('Property value must be positive')
+        return v
+
+    @root_validator(skip_on_failure=True)
+    def axis_must_be_valid(cls, values):
+        axis, axis_range = values['axis'], values['axis_range']
+        if axis == SweepAxis.down_payment_percentage:
+            if not (0 <= axis_range.start <= 100 and 0 <= axis_range.stop <= 100):
+                raise ValueError('Down payment percentage must be between 0 and 100')
+            contract_years = values.get('contract_years')
+            if contract_years is None or contract_years < 0:
+                raise ValueError('Non-negative contract_years is required when sweeping down_payment_percentage')
+        else:
+            if axis_range.start < 0 or axis_range.stop < 0:
+                raise ValueError('Contract years must not be negative')
+            down_payment_percentage = values.get('down_payment_percentage')
+            if down_payment_percentage is None or not 0 <= down_payment_percentage <= 100:
+                raise ValueError('down_payment_percentage between 0 and 100 is required when sweeping contract_years')
+        return values
+
+class SimulationSweepResult(BaseModel):
+    property_value: List[float]
+    down_payment_percentage: Union[List[float], float]
+    contract_years: Union[List[int], int]
+    # Matrizes [property_value][eixo variado]
+    down_payment_value: List[List[float]]
+    financing_amount: List[List[float]]
+    additional_costs: List[List[float]]
+    monthly_savings: List[List[float]]
+
+# Monte Carlo
+class DistributionParams(BaseModel):
+    # Média e desvio padrão anuais, em %
+    mean: float = 0.0
+    std: float = 0.0
+
+    @validator('std')
+    def std_must_not_be_negative(cls, v):
+        if v < 0:
+            raise ValueError('Standard deviation must not be negative')
+        return v
+
+class MonteCarloRequest(BaseModel):
+    monthly_income: float
+    interest_rate: DistributionParams
+    income_growth: DistributionParams = DistributionParams()
+    property_appreciation: DistributionParams = DistributionParams()
+    paths: conint(ge=1000, le=100000) = 10000
+    # Limitada a 2**53 - 1 para que o cliente JavaScript devolva a semente sem perda
+    seed: Optional[conint(ge=0, le=2**53 - 1)] = None
+
+    @validator('monthly_income')
+    def monthly_income_must_be_positive(cls, v):
+        if v <= 0:
+            raise ValueError('Monthly income must be positive')
+        return v
+
+class PercentileBands(BaseModel):
+    p5: float
+    p25: float
+    p50: float
+    p75: float
+    p95: float
+
+class MonteCarloResult(BaseModel):
+    paths: int
+    seed: int
+    total_cost: PercentileBands
+    total_interest: PercentileBands
+    final_property_value: PercentileBands
+    max_commitment_ratio: PercentileBands
+    commitment_breach_probability: float
+    negative_equity_probability: float
+
+# Profiler de requisições (administração)
+class ProfilerConfig(BaseModel):
+    enabled: bool
+    # Fração das requisições elegíveis que são perfiladas
+    sample_rate: confloat(ge=0, le=1) = 0.01
+    # Caminhos declarados das rotas (ex.: /api/simulations/{simulation_id}); vazio = todas
+    routes: List[str] = []
+
+class ProfileFile(BaseModel):
+    name: str
+    bytes: int
+
+class ProfilerStatus(ProfilerConfig):
+    running: bool
+    profiled: int
+    skipped: int
+    interval_ms: float
+    max_files: int
+    profiles: List[ProfileFile]
@@ -0,0 +1,90 @@
+"""Conta os comandos SQL emitidos por requisição em cada rota principal da API.
+
+Uso (a partir de backend/):
+
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.query_count [--json saida.json]
+
+Roda a aplicação em processo (TestClient, com o lifespan) contra o banco de
+DATABASE_URL e registra, via `before_cursor_execute`, quantos comandos cada
+requisição enviou ao banco. O cache de usuários é aquecido antes da medição,
+então os números refletem só o trabalho da rota.
+"""
+import argparse
+import json
+import sys
+import uuid
+from typing import Dict, List
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.database import engine as app_engine
+from app.main import app
+
+SIMULATION = {"property_value": 500000, "down_payment_percentage": 20, "contract_years": 30, "name": "Benchmark"}
+
+
+def count_queries(client: TestClient, engine=app_engine) -> Dict[str, int]:
+    """Executa o fluxo cadastro → login → CRUD de simulação e devolve comandos SQL por rota."""
+    statements: List[str] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    counts = {}
+
+    def measure(name, method, url, status_code=200, **kwargs):
+        start = len(statements)
+        response = client.request(method, url, **kwargs)
+        assert response.status_code == status_code, (name, response.status_code, response.text)
+        counts[name] = len(statements) - start
+        return response
+
+    suffix = uuid.uuid4().hex[:12]
+    credentials = {"email": f"bench_{suffix}@example.com", "password": "benchmark-password"}
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        measure("POST /api/auth/register", "POST", "/api/auth/register",
+                json={**credentials, "username": f"bench_{suffix}"})
+        token = measure("POST /api/auth/login", "POST", "/api/auth/login", json=credentials).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        # Aquece o cache de get_current_user: as medições seguintes contam só a rota
+        client.get("/api/auth/me", headers=headers)
+
+        simulation_id = measure("POST /api/simulations", "POST", "/api/simulations",
+                                json=SIMULATION, headers=headers).json()["id"]
+        list_etag = measure("GET /api/simulations", "GET", "/api/simulations", headers=headers).headers["ETag"]
+        # Mesma página de novo: servida pelo cache de respostas, só a versão é lida
+        measure("GET /api/simulations cached", "GET", "/api/simulations", headers=headers)
+        etag = measure("GET /api/simulations/{id}", "GET", f"/api/simulations/{simulation_id}",
+                       headers=headers).headers["ETag"]
+        # Polling com If-None-Match: nada mudou, resposta 304 sem corpo
+        measure("GET /api/simulations 304", "GET", "/api/simulations", status_code=304,
+                headers={**headers, "If-None-Match": list_etag})
+        measure("GET /api/simulations/{id} 304", "GET", f"/api/simulations/{simulation_id}", status_code=304,
+                headers={**headers, "If-None-Match": etag})
+        measure("PUT /api/simulations/{id}", "PUT", f"/api/simulations/{simulation_id}",
+                json={**SIMULATION, "property_value": 550000}, headers=headers)
+        measure("DELETE /api/simulations/{id}", "DELETE", f"/api/simulations/{simulation_id}", headers=headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return counts
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--json", help="grava as contagens neste arquivo")
+    args = parser.parse_args(argv)
+
+    with TestClient(app) as client:
+        counts = count_queries(client)
+    for route, count in counts.items():
+        print(f"{route:32} {count}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(counts, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""Popula o banco com usuários e simulações sintéticas para os benchmarks.
+
+Os valores derivados vêm do mesmo motor vetorizado da aplicação, então as
+linhas são indistinguíveis das criadas pela API. As datas de criação são
+espalhadas pelo último ano para que a ordenação por `created_at` tenha a
+distribuição de um banco real.
+"""
+import re
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+import numpy as np
+from sqlalchemy import func, insert, select, text
+
+from app import models
+from app.core.hashing import hash_password
+from app.engine import calculate_simulations
+
+SEED_PASSWORD = "benchmark-password"
+SEED_CHUNK_ROWS = 10000
+
+
+SEED_EMAIL_PATTERN = re.compile(r"bench\d+@example\.com")
+
+
+def seed_user_email(index: int) -> str:
+    return f"bench{index}@example.com"
+
+
+def seeded_user_emails(engine) -> List[str]:
+    """E-mails dos usuários criados pelo seed (senha SEED_PASSWORD), em ordem de id."""
+    with engine.connect() as connection:
+        emails = connection.scalars(
+            select(models.User.email).where(models.User.email.like("bench%@example.com")).order_by(models.User.id)
+        ).all()
+    return [email for email in emails if SEED_EMAIL_PATTERN.fullmatch(email)]
+
+
+def seed(engine, simulations: int, users: int, chunk_size: int = SEED_CHUNK_ROWS, random_seed: int = 0):
+    """Insere `users` usuários e `simulations` simulações distribuídas entre eles.
+
+    Não apaga nada: chame em um banco vazio (ou use `ensure_seeded`).
+    """
+    rng = np.random.default_rng(random_seed)
+    # Um único bcrypt: todos os usuários sintéticos compartilham a senha
+    password_hash = hash_password(SEED_PASSWORD)
+
+    with engine.begin() as connection:
+        # Continua a numeração ao completar um banco já populado
+        first = connection.scalar(select(func.count()).select_from(models.User))
+        user_ids = []
+        for start in range(first, first + users, chunk_size):
+            rows = [
+                {"username": f"bench{i}", "email": seed_user_email(i), "password_hash": password_hash}
+                for i in range(start, min(start + chunk_size, first + users))
+            ]
+            user_ids.extend(connection.scalars(insert(models.User).returning(models.User.id), rows).all())
+        user_ids = np.asarray(user_ids)
+
+        now = datetime.now(timezone.utc)
+        for start in range(0, simulations, chunk_size):
+            count = min(chunk_size, simulations - start)
+            property_value = np.round(rng.uniform(100000, 2000000, count), 2)
+            down_payment_percentage = np.round(rng.uniform(0, 50, count), 1)
+            contract_years = rng.integers(1, 36, count)
+            derived = calculate_simulations(property_value, down_payment_percentage, contract_years)
+            ages = rng.integers(0, 365 * 24 * 3600, count).tolist()
+
+            columns = {
+                "user_id": user_ids[rng.integers(0, len(user_ids), count)].tolist(),
+                "property_value": property_value.tolist(),
+                "down_payment_percentage": down_payment_percentage.tolist(),
+                "contract_years": contract_years.tolist(),
+                **{name: values.tolist() for name, values in derived._asdict().items()},
+            }
+            rows = [dict(zip(columns, values)) for values in zip(*columns.values())]
+            for row, age in zip(rows, ages):
+                row["created_at"] = row["updated_at"] = now - timedelta(seconds=age)
+            connection.execute(insert(models.Simulation), rows)
+
+        # Estatísticas atualizadas: o planejador escolhe os índices pelo tamanho real das tabelas
+        connection.execute(text("ANALYZE"))
+
+
+def ensure_seeded(engine, simulations: int, users: int, **kwargs) -> bool:
+    """Popula o banco se ele ainda não tiver `simulations` linhas. Retorna se populou."""
+    with engine.connect() as connection:
+        existing = connection.scalar(select(func.count()).select_from(models.Simulation))
+    if existing >= simulations:
+        return False
+    seed(engine, simulations - existing, users, **kwargs)
+    return True
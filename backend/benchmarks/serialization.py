@@ -0,0 +1,108 @@
+"""Compara o custo de serializar uma página de simulações pelos dois caminhos.
+
+Uso (a partir de backend/):
+
+    python -m benchmarks.serialization --rows 1000 --repeat 50
+
+- `response_model`: objetos ORM validados por `List[schemas.Simulation]` com
+  orm_mode, `jsonable_encoder` e `json.dumps`, como o FastAPI faz por padrão.
+- `orjson`: tuplas com as colunas da resposta (como `crud.get_simulation_page`)
+  serializadas direto pelo orjson, como em `GET /api/simulations`.
+
+Não usa banco: mede só a CPU de serialização.
+"""
+import argparse
+import asyncio
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+import orjson
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app import models, schemas
+
+SimulationRow = namedtuple("SimulationRow", list(schemas.Simulation.__fields__))
+
+
+def sample_simulations(rows: int):
+    now = datetime.now(timezone.utc)
+    values = [
+        {
+            "id": i,
+            "user_id": 1,
+            "property_value": 500000.0 + i,
+            "down_payment_percentage": 20.0,
+            "contract_years": 30,
+            "name": f"Simulação {i}",
+            "notes": None,
+            "down_payment_value": 100000.0 + i * 0.2,
+            "financing_amount": 400000.0 + i * 0.8,
+            "additional_costs": 75000.0 + i * 0.15,
+            "monthly_savings": (75000.0 + i * 0.15) / 360,
+            "created_at": now - timedelta(minutes=i),
+            "updated_at": now - timedelta(minutes=i),
+        }
+        for i in range(rows)
+    ]
+    orm_objects = [models.Simulation(**value) for value in values]
+    tuples = [SimulationRow(**{name: value[name] for name in SimulationRow._fields}) for value in values]
+    return orm_objects, tuples
+
+
+def time_per_call(fn, repeat: int) -> float:
+    fn()
+    start = time.process_time()
+    for _ in range(repeat):
+        fn()
+    return (time.process_time() - start) / repeat
+
+
+def run(rows: int, repeat: int) -> dict:
+    orm_objects, tuples = sample_simulations(rows)
+    field = create_response_field(name="Response_read_simulations", type_=List[schemas.Simulation])
+    # Um único event loop: criar um por chamada somaria custo que não é de serialização
+    loop = asyncio.new_event_loop()
+
+    def response_model_path() -> bytes:
+        content = loop.run_until_complete(
+            serialize_response(field=field, response_content=orm_objects, is_coroutine=True)
+        )
+        return JSONResponse(content).body
+
+    def orjson_path() -> bytes:
+        return orjson.dumps([dict(zip(SimulationRow._fields, row)) for row in tuples])
+
+    try:
+        baseline = time_per_call(response_model_path, repeat)
+        fast = time_per_call(orjson_path, repeat)
+    finally:
+        loop.close()
+    return {
+        "rows": rows,
+        "response_model_ms": baseline * 1000,
+        "orjson_ms": fast * 1000,
+        "speedup": baseline / fast,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    result = run(args.rows, args.repeat)
+    print(
+        f"{result['rows']} rows: response_model {result['response_model_ms']:.2f} ms, "
+        f"orjson {result['orjson_ms']:.2f} ms ({result['speedup']:.1f}x)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
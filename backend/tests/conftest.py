@@ -1,10 +1,14 @@
+import asyncio
+
 import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from fastapi.testclient import TestClient
 
 from app.main import app
-from app.database import Base, get_db
+from app.auth import clear_user_cache
+from app.core.response_cache import simulation_list_cache
+from app.database import Base, get_db, engine as app_engine
 
 # Use an in-memory SQLite database for testing
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -18,6 +22,18 @@ engine = create_engine(
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+@pytest.fixture(scope="session", autouse=True)
+def app_schema():
+    # TestClients criados fora de um bloco `with` não rodam o lifespan, que cria as tabelas
+    Base.metadata.create_all(bind=app_engine)
+
+
+@pytest.fixture(autouse=True)
+def clear_list_cache():
+    # A chave do cache é (usuário, versão): bancos diferentes entre testes repetem os dois
+    asyncio.run(simulation_list_cache.clear())
+
+
 @pytest.fixture(scope="session")
 def db_engine():
     Base.metadata.create_all(bind=engine)
@@ -34,6 +50,7 @@ def db_session(db_engine):
     # Clean up data between tests
     Base.metadata.drop_all(bind=db_engine)
     Base.metadata.create_all(bind=db_engine)
+    clear_user_cache()
 
     yield session
 
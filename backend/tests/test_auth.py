@@ -146,10 +146,64 @@ def test_get_current_user(client: TestClient):
     user_data = response.json()
     assert user_data["email"] == current_user_email
     assert "id" in user_data
+
+    # Segunda chamada com o mesmo token é servida pelo cache
+    assert client.get("/api/auth/me", headers=headers).json() == user_data
     # Note: The 'username' in the response might still be the registered username
     # depending on your schema and what's returned, but email is the key for auth.
 
 def test_get_current_user_unauthorized(client: TestClient):
     # Attempt to get current user info without a token
     response = client.get("/api/auth/me")
-    assert response.status_code == 401
\ No newline at end of file
+    assert response.status_code == 401
+
+def test_update_current_user(client: TestClient):
+    client.post(
+        "/api/auth/register",
+        json={
+            "username": "profileuser",
+            "email": "profileuser@example.com",
+            "password": "profilepassword"
+        }
+    )
+    login_response = client.post(
+        "/api/auth/login",
+        json={"email": "profileuser@example.com", "password": "profilepassword"}
+    )
+    headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+    # Senha atual incorreta
+    wrong_password_response = client.put(
+        "/api/auth/me",
+        json={
+            "username": "profileuser2",
+            "email": "profileuser@example.com",
+            "current_password": "wrongpassword"
+        },
+        headers=headers
+    )
+    assert wrong_password_response.status_code == 400
+    assert wrong_password_response.json()["detail"] == "Current password is incorrect"
+
+    response = client.put(
+        "/api/auth/me",
+        json={
+            "username": "profileuser2",
+            "email": "profileuser@example.com",
+            "current_password": "profilepassword",
+            "new_password": "newprofilepassword"
+        },
+        headers=headers
+    )
+    assert response.status_code == 200
+    assert response.json()["username"] == "profileuser2"
+
+    # O cache de usuário do token é invalidado na atualização
+    me_response = client.get("/api/auth/me", headers=headers)
+    assert me_response.json()["username"] == "profileuser2"
+
+    relogin_response = client.post(
+        "/api/auth/login",
+        json={"email": "profileuser@example.com", "password": "newprofilepassword"}
+    )
+    assert relogin_response.status_code == 200
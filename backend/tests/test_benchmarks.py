@@ -0,0 +1,110 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.database import engine as app_engine
+from app.main import app
+from benchmarks.explain_check import (
+    check_plans,
+    create_benchmark_engine,
+    migrate,
+    postgres_seq_scans,
+    sqlite_seq_scans,
+)
+from benchmarks.load import compare, prepare_database, run_load
+from benchmarks.query_count import count_queries
+from benchmarks.serialization import run as run_serialization
+from benchmarks.seed import ensure_seeded
+
+# Detecção de varredura sequencial nos dois formatos de EXPLAIN
+def test_seq_scan_detection():
+    plan = {
+        "Node Type": "Limit",
+        "Plans": [
+            {"Node Type": "Index Scan", "Relation Name": "simulations"},
+            {"Node Type": "Seq Scan", "Relation Name": "users"},
+            {"Node Type": "Seq Scan", "Relation Name": "alembic_version"},
+        ],
+    }
+    assert postgres_seq_scans(plan) == ["users"]
+
+    rows = [
+        (2, 0, 0, "SEARCH simulations USING INDEX ix_simulations_user_id_created_at_id (user_id=?)"),
+        (3, 0, 0, "SCAN users"),
+        (4, 0, 0, "USE TEMP B-TREE FOR ORDER BY"),
+    ]
+    assert sqlite_seq_scans(rows) == ["users"]
+
+# Banco migrado pelo Alembic: nenhuma consulta do crud varre uma tabela inteira
+def test_crud_queries_use_indexes(tmp_path):
+    engine = create_benchmark_engine(f"sqlite:///{tmp_path / 'explain.db'}")
+    with engine.connect() as connection:
+        migrate(connection)
+    assert ensure_seeded(engine, simulations=5000, users=50)
+    assert not ensure_seeded(engine, simulations=5000, users=50)
+
+    reports = check_plans(engine)
+    assert {report.operation for report in reports} >= {"get_simulations", "get_simulations_after", "delete_simulation"}
+    assert [report for report in reports if report.seq_scans] == []
+
+    # As gravações do crud foram desfeitas
+    assert not ensure_seeded(engine, simulations=5000, users=50)
+    engine.dispose()
+
+# Escritas não fazem SELECT de refresh: cada rota de simulação custa um comando SQL,
+# mais o incremento da versão da lista (ETag) nas que gravam. A listagem lê a versão
+# antes da página (chave do cache de respostas); com a página no cache, só a versão
+def test_query_count_per_request():
+    overrides = dict(app.dependency_overrides)
+    app.dependency_overrides.clear()
+    try:
+        counts = count_queries(TestClient(app))
+    finally:
+        app.dependency_overrides.update(overrides)
+
+    assert counts == {
+        "POST /api/auth/register": 3,
+        "POST /api/auth/login": 2,
+        "POST /api/simulations": 2,
+        "GET /api/simulations": 2,
+        "GET /api/simulations cached": 1,
+        "GET /api/simulations/{id}": 1,
+        "GET /api/simulations 304": 1,
+        "GET /api/simulations/{id} 304": 1,
+        "PUT /api/simulations/{id}": 2,
+        "DELETE /api/simulations/{id}": 2,
+    }
+
+# O caminho orjson da listagem é bem mais barato que a validação pelo response_model
+def test_list_serialization_is_faster_than_response_model():
+    result = run_serialization(rows=200, repeat=3)
+    assert result["speedup"] > 5
+
+# Carga pequena contra a aplicação real: todas as operações da mistura rodam sem erro
+def test_load_run_reports_percentiles():
+    overrides = dict(app.dependency_overrides)
+    app.dependency_overrides.clear()
+    try:
+        emails = prepare_database(app_engine, rows=100, users=3, concurrency=3)
+        report = asyncio.run(run_load(emails, concurrency=3, requests=60, random_seed=1))
+    finally:
+        app.dependency_overrides.update(overrides)
+
+    assert len(set(emails)) == 3
+    assert report["total"]["count"] == 63  # 60 operações + o login inicial de cada cliente
+    assert report["total"]["errors"] == 0
+    assert {"list", "create", "login"} <= set(report["operations"])
+    for stats in report["operations"].values():
+        assert stats["p50_ms"] <= stats["p95_ms"] <= stats["p99_ms"]
+        assert stats["rps"] > 0
+
+def test_compare_flags_regressions():
+    baseline = {"operations": {"read": {"p95_ms": 10.0, "rps": 100.0}, "list": {"p95_ms": 10.0, "rps": 100.0}}}
+    report = {"operations": {
+        "read": {"p95_ms": 11.0, "rps": 90.0},
+        "list": {"p95_ms": 13.0, "rps": 70.0},
+        "create": {"p95_ms": 50.0, "rps": 1.0},
+    }}
+    regressions = compare(report, baseline, tolerance=0.2)
+    assert len(regressions) == 2
+    assert all(regression.startswith("list:") for regression in regressions)
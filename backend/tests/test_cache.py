@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.cache import TTLCache
+from app.core.response_cache import (
+    InMemoryRedis,
+    MemoryCacheBackend,
+    RedisCacheBackend,
+    cache_stats,
+    create_cache_backend,
+)
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" passa a ser o mais recente
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+def test_ttl_cache_respects_expiration():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("short", 1, expires_at=time.time() + 0.05)
+    cache.set("expired", 2, expires_at=time.time() - 1)
+
+    assert cache.get("short") == 1
+    assert cache.get("expired") is None
+    time.sleep(0.06)
+    assert cache.get("short") is None
+
+def test_ttl_cache_delete_where():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("token-1", {"id": 1})
+    cache.set("token-2", {"id": 1})
+    cache.set("token-3", {"id": 2})
+
+    cache.delete_where(lambda user: user["id"] == 1)
+
+    assert cache.get("token-1") is None
+    assert cache.get("token-2") is None
+    assert cache.get("token-3") == {"id": 2}
+
+def test_memory_cache_backend_bounds_and_invalidation():
+    cache = MemoryCacheBackend(max_entries=3, max_bytes=10, max_value_bytes=6, ttl=60)
+
+    async def scenario():
+        await cache.set(1, "a", b"1234")
+        await cache.set(1, "b", b"1234")
+        assert await cache.get(1, "a") == b"1234"  # "a" passa a ser o mais recente
+        # 12 bytes > max_bytes: sai a entrada menos recente
+        await cache.set(2, "a", b"1234")
+        assert await cache.get(1, "b") is None
+        await cache.set(2, "big", b"1234567")  # maior que max_value_bytes: não é guardada
+        assert await cache.get(2, "big") is None
+
+        await cache.invalidate(1)
+        assert await cache.get(1, "a") is None
+        assert await cache.get(2, "a") == b"1234"
+
+    asyncio.run(scenario())
+    stats = cache_stats(cache)
+    assert stats["backend"] == "memory"
+    assert (stats["hits"], stats["misses"]) == (2, 3)
+    assert (stats["evictions"], stats["oversized"], stats["invalidations"]) == (1, 1, 1)
+    assert (stats["entries"], stats["bytes"]) == (1, 4)
+
+def test_redis_cache_backend_with_in_memory_redis():
+    client = InMemoryRedis()
+    cache = RedisCacheBackend(client, max_value_bytes=100, ttl=60)
+    other = RedisCacheBackend(client, max_value_bytes=100, ttl=60)
+
+    async def scenario():
+        await cache.set(1, "page", b"body")
+        await cache.set(2, "page", b"other")
+        # Outro processo com o mesmo servidor vê a entrada e a invalidação
+        assert await other.get(1, "page") == b"body"
+        await other.invalidate(1)
+        assert await cache.get(1, "page") is None
+        assert await cache.get(2, "page") == b"other"
+
+        await client.expire("response-cache:2", 0)
+        assert await cache.get(2, "page") is None
+
+        await cache.set(3, "page", b"body")
+        await client.hset("unrelated", "field", b"kept")
+        await cache.clear()
+        assert await cache.get(3, "page") is None
+        assert await client.hget("unrelated", "field") == b"kept"
+
+    asyncio.run(scenario())
+    assert cache.stats.snapshot()["misses"] == 3
+    assert other.stats.snapshot()["invalidations"] == 1
+
+def test_create_cache_backend():
+    assert isinstance(create_cache_backend("memory"), MemoryCacheBackend)
+    assert isinstance(create_cache_backend("redis", "memory://").client, InMemoryRedis)
+    assert not create_cache_backend("none").enabled
+    with pytest.raises(ValueError):
+        create_cache_backend("memcached")
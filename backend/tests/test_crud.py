@@ -1,5 +1,5 @@
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
 from app.database import Base
@@ -42,6 +42,18 @@ def override_get_db(db):
     yield
     app.dependency_overrides.clear()
 
+# Fixture que registra os comandos SQL enviados ao banco durante o teste
+@pytest.fixture
+def statements():
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append(statement)
+
+    event.listen(engine, "before_cursor_execute", capture)
+    yield captured
+    event.remove(engine, "before_cursor_execute", capture)
+
 # Teste para criar um usuário
 def test_create_user(db):
     user_data = schemas.UserCreate(username="testuser", email="test@example.com", password="testpassword123")
@@ -218,6 +230,47 @@ def test_update_simulation(db):
     not_found_update = crud.update_simulation(db=db, simulation_id=999, simulation=update_data)
     assert not_found_update is None
 
+    # Outro usuário não consegue atualizar a simulação
+    assert crud.update_simulation(
+        db=db, simulation_id=created_simulation.id, simulation=schemas.SimulationUpdate(
+            property_value=1.0, down_payment_percentage=0.0, contract_years=1
+        ), user_id=db_user.id + 1
+    ) is None
+    assert crud.get_simulation(db=db, simulation_id=created_simulation.id).property_value == 600000.0
+
+# Atualizar e deletar com checagem do dono custam um único comando SQL cada, mais o
+# incremento da versão da lista do usuário (só quando a simulação existe)
+def test_owner_scoped_mutations_are_single_statements(db, statements):
+    db_user = crud.create_user(db=db, user=schemas.UserCreate(
+        username="singlequery", email="single@example.com", password="testpassword_s"
+    ))
+    simulation_data = schemas.SimulationCreate(property_value=500000.0, down_payment_percentage=20.0, contract_years=30)
+    simulation_id = crud.create_simulation(db=db, simulation=simulation_data, user_id=db_user.id).id
+    user_id = db_user.id
+    update_data = schemas.SimulationUpdate(property_value=550000.0, down_payment_percentage=20.0, contract_years=30)
+
+    version = crud.get_simulations_version(db, user_id)
+
+    statements.clear()
+    updated = crud.update_simulation(db=db, simulation_id=simulation_id, simulation=update_data, user_id=user_id)
+    assert [statement.split()[:2] for statement in statements] == [["UPDATE", "simulations"], ["UPDATE", "users"]]
+    assert "RETURNING" in statements[0]
+    assert updated.financing_amount == 440000.0
+    assert crud.get_simulations_version(db, user_id) == version + 1
+
+    statements.clear()
+    assert crud.update_simulation(db=db, simulation_id=simulation_id, simulation=update_data, user_id=user_id + 1) is None
+    assert [statement.split()[:2] for statement in statements] == [["UPDATE", "simulations"]]
+
+    statements.clear()
+    assert crud.get_simulation(db=db, simulation_id=simulation_id, user_id=user_id + 1) is None
+    assert len(statements) == 1
+
+    statements.clear()
+    assert crud.delete_simulation(db=db, simulation_id=simulation_id, user_id=user_id) == simulation_id
+    assert [statement.split()[0] for statement in statements] == ["DELETE", "UPDATE"]
+    assert crud.get_simulations_version(db, user_id) == version + 2
+
 # Teste para deletar uma simulação
 def test_delete_simulation(db):
     # Crie um usuário e uma simulação
@@ -233,12 +286,15 @@ def test_delete_simulation(db):
     # Verificar que a simulação existe antes de deletar
     assert crud.get_simulation(db=db, simulation_id=created_simulation.id) is not None
 
+    # Outro usuário não consegue deletar a simulação
+    assert crud.delete_simulation(db=db, simulation_id=created_simulation.id, user_id=db_user.id + 1) is None
+    assert crud.get_simulation(db=db, simulation_id=created_simulation.id) is not None
+
     # Deletar a simulação
-    deleted_simulation = crud.delete_simulation(db=db, simulation_id=created_simulation.id)
+    deleted_id = crud.delete_simulation(db=db, simulation_id=created_simulation.id, user_id=db_user.id)
 
-    # Verificar se a simulação retornada pela função delete é a correta
-    assert deleted_simulation is not None
-    assert deleted_simulation.id == created_simulation.id
+    # Verificar se o id retornado pela função delete é o correto
+    assert deleted_id == created_simulation.id
 
     # Verificar que a simulação não existe mais no banco de dados
     assert crud.get_simulation(db=db, simulation_id=created_simulation.id) is None
@@ -307,4 +363,73 @@ def test_update_simulation_zero_years(db):
     assert updated_simulation.down_payment_value == expected_down_payment_value
     assert updated_simulation.financing_amount == expected_financing_amount
     assert updated_simulation.additional_costs == expected_additional_costs
-    assert updated_simulation.monthly_savings == expected_monthly_savings 
\ No newline at end of file
+    assert updated_simulation.monthly_savings == expected_monthly_savings 
+
+# Teste para criar simulações em lote e verificar os cálculos vetorizados
+def test_create_simulations_batch(db):
+    user_data = schemas.UserCreate(username="batchuser", email="batch@example.com", password="testpassword_b")
+    db_user = crud.create_user(db=db, user=user_data)
+
+    simulations_data = [
+        schemas.SimulationCreate(property_value=500000.0, down_payment_percentage=20.0, contract_years=30, name="Lote 1"),
+        schemas.SimulationCreate(property_value=200000.0, down_payment_percentage=10.0, contract_years=0, name="Lote 2"),
+        schemas.SimulationCreate(property_value=350000.0, down_payment_percentage=0.0, contract_years=15, notes="Sem entrada"),
+    ]
+
+    ids = crud.create_simulations_batch(db=db, simulations=simulations_data, user_id=db_user.id)
+
+    assert len(ids) == 3
+    assert len(set(ids)) == 3
+
+    for simulation_id, simulation_data in zip(ids, simulations_data):
+        db_simulation = crud.get_simulation(db=db, simulation_id=simulation_id)
+        single = crud.create_simulation(db=db, simulation=simulation_data, user_id=db_user.id)
+
+        assert db_simulation.user_id == db_user.id
+        assert db_simulation.name == simulation_data.name
+        assert db_simulation.notes == simulation_data.notes
+        assert db_simulation.down_payment_value == single.down_payment_value
+        assert db_simulation.financing_amount == single.financing_amount
+        assert db_simulation.additional_costs == single.additional_costs
+        assert db_simulation.monthly_savings == pytest.approx(single.monthly_savings)
+
+# Teste da paginação keyset: ordem estável e sem repetições entre páginas
+def test_get_simulations_keyset_pagination(db):
+    user_data = schemas.UserCreate(username="pageuser", email="page@example.com", password="testpassword_p")
+    db_user = crud.create_user(db=db, user=user_data)
+    simulations_data = [
+        schemas.SimulationCreate(property_value=100000 + i, down_payment_percentage=10, contract_years=10)
+        for i in range(5)
+    ]
+    ids = crud.create_simulations_batch(db=db, simulations=simulations_data, user_id=db_user.id)
+
+    first_page = crud.get_simulations(db=db, user_id=db_user.id, limit=2)
+    last = first_page[-1]
+    second_page = crud.get_simulations(db=db, user_id=db_user.id, limit=2, after=(last.created_at, last.id))
+    last = second_page[-1]
+    third_page = crud.get_simulations(db=db, user_id=db_user.id, limit=2, after=(last.created_at, last.id))
+
+    # Criadas no mesmo instante: o id desempata, mais recentes primeiro
+    assert [sim.id for sim in first_page + second_page + third_page] == sorted(ids, reverse=True)
+
+# Import em blocos: valores derivados vetorizados, sem commit até a rota confirmar
+def test_import_simulations(db):
+    db_user = crud.create_user(db=db, user=schemas.UserCreate(username="importuser", email="import@example.com", password="testpassword_i"))
+    simulations_data = [
+        schemas.SimulationCreate(property_value=500000.0, down_payment_percentage=20.0, contract_years=30, name="Import"),
+        schemas.SimulationCreate(property_value=200000.0, down_payment_percentage=10.0, contract_years=0),
+    ]
+
+    assert crud.import_simulations(db=db, simulations=simulations_data, user_id=db_user.id) == 2
+    imported = crud.get_simulations(db=db, user_id=db_user.id)
+    assert {simulation.name for simulation in imported} == {"Import", None}
+
+    db.rollback()
+    assert crud.get_simulations(db=db, user_id=db_user.id) == []
+
+# Formato texto do COPY: NULL, escapes e floats sem perda
+def test_copy_value():
+    assert crud._copy_value(None) == "\\N"
+    assert crud._copy_value("a\tb\nc\\d\r") == "a\\tb\\nc\\\\d\\r"
+    assert crud._copy_value(0.1 + 0.2) == "0.30000000000000004"
+    assert crud._copy_value(30) == "30"
@@ -0,0 +1,115 @@
+import json
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from app.main import app
+from app.auth import clear_user_cache
+from app.database import (
+    Base,
+    Database,
+    engine_options,
+    get_database,
+    instrumented_pool_class,
+    pool_status,
+    to_async_url,
+)
+
+def test_to_async_url():
+    assert to_async_url("postgresql://u:p@db:5432/amora") == "postgresql+asyncpg://u:p@db:5432/amora"
+    assert to_async_url("postgresql+psycopg2://u:p@db/amora") == "postgresql+asyncpg://u:p@db/amora"
+    assert to_async_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+    assert to_async_url("postgresql+asyncpg://db/amora") == "postgresql+asyncpg://db/amora"
+
+# Fluxo completo da API com AsyncSession (aiosqlite), como no modo DATABASE_ASYNC
+def test_async_database_api_flow(tmp_path):
+    database_url = f"sqlite:///{tmp_path / 'async.db'}"
+    Base.metadata.create_all(bind=create_engine(database_url))
+    # NullPool: cada requisição do TestClient roda em um event loop próprio
+    async_engine = create_async_engine(to_async_url(database_url), poolclass=NullPool)
+    AsyncTestingSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_database():
+        async with AsyncTestingSessionLocal() as session:
+            yield Database(session)
+
+    app.dependency_overrides[get_database] = override_get_database
+    clear_user_cache()
+    try:
+        client = TestClient(app)
+        client.post(
+            "/api/auth/register",
+            json={"username": "asyncuser", "email": "async@example.com", "password": "asyncpassword"}
+        )
+        login_response = client.post(
+            "/api/auth/login",
+            json={"email": "async@example.com", "password": "asyncpassword"}
+        )
+        assert login_response.status_code == 200
+        headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+        create_response = client.post(
+            "/api/simulations",
+            json={"property_value": 500000, "down_payment_percentage": 20, "contract_years": 30},
+            headers=headers
+        )
+        assert create_response.status_code == 200
+        sim_id = create_response.json()["id"]
+        assert create_response.json()["financing_amount"] == 400000.0
+
+        update_response = client.put(
+            f"/api/simulations/{sim_id}",
+            json={"property_value": 600000, "down_payment_percentage": 20, "contract_years": 30},
+            headers=headers
+        )
+        assert update_response.status_code == 200
+        assert update_response.json()["financing_amount"] == 480000.0
+
+        list_response = client.get("/api/simulations", headers=headers)
+        assert [sim["id"] for sim in list_response.json()] == [sim_id]
+
+        # Exportação pelo cursor do AsyncSession.stream
+        export_response = client.get("/api/simulations/export?format=ndjson", headers=headers)
+        assert export_response.status_code == 200
+        assert [sim["id"] for sim in map(json.loads, export_response.text.splitlines())] == [sim_id]
+
+        assert client.delete(f"/api/simulations/{sim_id}", headers=headers).status_code == 200
+        assert client.get(f"/api/simulations/{sim_id}", headers=headers).status_code == 404
+    finally:
+        app.dependency_overrides.pop(get_database, None)
+        clear_user_cache()
+
+def test_instrumented_pool_records_checkouts(tmp_path):
+    pool_class = instrumented_pool_class(QueuePool)
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=pool_class, pool_size=2, max_overflow=1)
+
+    with engine.connect() as first, engine.connect() as second:
+        status = pool_status(engine.pool)
+        assert status["checkedout"] == 2
+        assert status["size"] == 2
+
+    status = pool_status(engine.pool)
+    assert status["class"] == "InstrumentedQueuePool"
+    assert status["checkedout"] == 0
+    assert status["checkouts"] == 2
+    assert status["checkout_seconds_max"] >= 0
+
+    # Estatísticas são por classe gerada, não compartilhadas entre engines
+    assert instrumented_pool_class(QueuePool).stats is not pool_class.stats
+
+def test_engine_options():
+    assert engine_options("sqlite:///./test.db") == {}
+
+    options = engine_options("postgresql://u:p@db/amora")
+    assert issubclass(options["poolclass"], QueuePool)
+    assert options["pool_pre_ping"] is True
+
+    async_options = engine_options("postgresql+asyncpg://u:p@db/amora", asyncio=True)
+    assert issubclass(async_options["poolclass"], AsyncAdaptedQueuePool)
+
+def test_pool_health_endpoint():
+    response = TestClient(app).get("/api/health/pool")
+    assert response.status_code == 200
+    assert "class" in response.json()["sync"]
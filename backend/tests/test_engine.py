@@ -0,0 +1,167 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.engine import monte_carlo
+from app.engine import (
+    ADDITIONAL_COSTS_RATE,
+    amortization_schedule,
+    calculate_simulation,
+    calculate_simulations,
+    iter_schedule_csv,
+    iter_schedule_ndjson,
+    MonteCarloSaturated,
+    MonteCarloTimeout,
+    monthly_rate,
+    run_monte_carlo,
+    simulate_paths,
+    summarize,
+)
+
+# Teste do cálculo escalar, sem banco de dados
+def test_calculate_simulation():
+    result = calculate_simulation(500000.0, 20.0, 30)
+
+    assert result.down_payment_value == 500000.0 * (20.0 / 100)
+    assert result.financing_amount == 500000.0 - result.down_payment_value
+    assert result.additional_costs == 500000.0 * ADDITIONAL_COSTS_RATE
+    assert result.monthly_savings == pytest.approx(result.additional_costs / (30 * 12))
+    assert isinstance(result.monthly_savings, float)
+
+def test_calculate_simulation_zero_years():
+    result = calculate_simulation(200000.0, 20.0, 0)
+
+    assert result.monthly_savings == result.additional_costs
+
+# O caminho vetorizado deve produzir os mesmos valores que o escalar
+def test_calculate_simulations_matches_scalar():
+    property_values = [100000.0, 250000.0, 999999.99]
+    down_payment_percentages = [0.0, 35.5, 100.0]
+    contract_years = [0, 15, 35]
+
+    arrays = calculate_simulations(property_values, down_payment_percentages, contract_years)
+
+    for i, inputs in enumerate(zip(property_values, down_payment_percentages, contract_years)):
+        assert calculate_simulation(*inputs) == tuple(values[i] for values in arrays)
+
+def test_calculate_simulations_broadcasts_grid():
+    property_values = np.array([100000.0, 200000.0, 300000.0])
+    contract_years = np.array([0, 10])
+
+    arrays = calculate_simulations(property_values[:, None], 20.0, contract_years[None, :])
+
+    assert arrays.monthly_savings.shape == (3, 2)
+    assert arrays.financing_amount.shape == (3, 2)
+    assert arrays.monthly_savings[1, 0] == 200000.0 * ADDITIONAL_COSTS_RATE
+    assert arrays.monthly_savings[2, 1] == pytest.approx(300000.0 * ADDITIONAL_COSTS_RATE / 120)
+
+# Sistema SAC: amortização constante e parcelas decrescentes
+def test_amortization_schedule_sac():
+    schedule = amortization_schedule(120000.0, 12.0, 120, system="sac")
+
+    assert len(schedule.month) == 120
+    assert schedule.month[0] == 1 and schedule.month[-1] == 120
+    assert np.allclose(schedule.amortization, 1000.0)
+    assert np.all(np.diff(schedule.installment) < 0)
+    assert schedule.interest[0] == pytest.approx(120000.0 * monthly_rate(12.0))
+    assert schedule.balance[-1] == 0.0
+    assert schedule.cumulative_interest[-1] == pytest.approx(schedule.interest.sum())
+
+# Sistema Price: parcela constante (PMT) e amortização crescente
+def test_amortization_schedule_price():
+    schedule = amortization_schedule(120000.0, 12.0, 120, system="price")
+
+    assert np.allclose(schedule.installment, schedule.installment[0])
+    assert np.all(np.diff(schedule.amortization) > 0)
+    assert schedule.amortization.sum() == pytest.approx(120000.0)
+    assert np.allclose(schedule.installment, schedule.interest + schedule.amortization)
+    assert schedule.balance[-1] == 0.0
+
+def test_amortization_schedule_edge_cases():
+    zero_rate = amortization_schedule(1200.0, 0.0, 12, system="price")
+    assert np.allclose(zero_rate.installment, 100.0)
+    assert zero_rate.cumulative_interest[-1] == 0.0
+
+    assert len(amortization_schedule(1200.0, 10.0, 0, system="sac").month) == 0
+    assert len(amortization_schedule(1200.0, 10.0, -12, system="price").month) == 0
+
+    with pytest.raises(ValueError):
+        amortization_schedule(1200.0, 10.0, 12, system="unknown")
+
+def test_iter_schedule_formats():
+    schedule = amortization_schedule(1000.0, 0.0, 3, system="sac")
+
+    csv_lines = "".join(iter_schedule_csv(schedule)).splitlines()
+    assert csv_lines[0] == "month,installment,interest,amortization,balance,cumulative_interest"
+    assert csv_lines[-1] == "3,333.33,0.00,333.33,0.00,0.00"
+
+    rows = [json.loads(line) for line in "".join(iter_schedule_ndjson(schedule)).splitlines()]
+    assert [row["month"] for row in rows] == [1, 2, 3]
+    assert rows[0]["balance"] == 666.67
+
+# Monte Carlo sem volatilidade reproduz a tabela Price determinística
+def test_simulate_paths_without_volatility():
+    result = simulate_paths(400000.0, 500000.0, 30, 15000.0, (10.0, 0.0), (0.0, 0.0), (0.0, 0.0), 100, seed=1)
+    schedule = amortization_schedule(400000.0, 10.0, 360, system="price")
+
+    assert np.allclose(result.total_paid, schedule.installment.sum())
+    assert np.allclose(result.max_commitment_ratio, schedule.installment[0] / 15000.0)
+    assert not result.negative_equity.any()
+    assert np.allclose(result.final_property_value, 500000.0)
+
+    # Prazo negativo (linhas antigas) equivale a contrato sem parcelas
+    empty = simulate_paths(400000.0, 500000.0, -1, 15000.0, (10.0, 0.0), (0.0, 0.0), (0.0, 0.0), 10, seed=1)
+    assert np.all(empty.total_paid == 0.0)
+
+def test_simulate_paths_is_reproducible():
+    args = (400000.0, 500000.0, 20, 8000.0, (10.0, 3.0), (3.0, 2.0), (4.0, 8.0), 1000)
+
+    first = simulate_paths(*args, seed=np.random.SeedSequence(42))
+    second = simulate_paths(*args, seed=np.random.SeedSequence(42))
+    other = simulate_paths(*args, seed=np.random.SeedSequence(43))
+
+    assert np.array_equal(first.total_paid, second.total_paid)
+    assert not np.array_equal(first.total_paid, other.total_paid)
+
+    summary = summarize(first, 400000.0, 100000.0, 75000.0)
+    bands = summary["total_cost"]
+    assert bands["p5"] <= bands["p50"] <= bands["p95"]
+    assert 0.0 <= summary["commitment_breach_probability"] <= 1.0
+
+def test_run_monte_carlo_time_budget():
+    simulation = SimpleNamespace(
+        property_value=500000.0,
+        financing_amount=400000.0,
+        down_payment_value=100000.0,
+        additional_costs=75000.0,
+        contract_years=30,
+    )
+    with pytest.raises(MonteCarloTimeout):
+        asyncio.run(run_monte_carlo(
+            simulation, 15000.0, (10.0, 2.0), (0.0, 0.0), (0.0, 0.0), paths=100000, seed=1, time_budget=1e-6
+        ))
+
+def test_run_monte_carlo_rejects_when_saturated(monkeypatch):
+    simulation = SimpleNamespace(
+        property_value=500000.0,
+        financing_amount=400000.0,
+        down_payment_value=100000.0,
+        additional_costs=75000.0,
+        contract_years=10,
+    )
+    # Ocupa um lote e reduz o limite: o próximo pedido não cabe mais na fila
+    monte_carlo._reserve_batches(1)
+    try:
+        with monkeypatch.context() as patch:
+            patch.setattr(monte_carlo, "MONTE_CARLO_MAX_PENDING_BATCHES", 1)
+            with pytest.raises(MonteCarloSaturated):
+                asyncio.run(run_monte_carlo(simulation, 15000.0, (10.0, 2.0), (0.0, 0.0), (0.0, 0.0), paths=1000))
+    finally:
+        monte_carlo._release_batch(None)
+
+    # Com espaço na fila o pedido é aceito e a semente gerada cabe em 53 bits
+    result = asyncio.run(run_monte_carlo(simulation, 15000.0, (10.0, 2.0), (0.0, 0.0), (0.0, 0.0), paths=1000))
+    assert 0 <= result["seed"] < 2**53
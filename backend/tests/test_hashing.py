@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+from app.core.hashing import HashingPoolSaturated, PasswordHasher
+
+def test_password_hasher_round_trip():
+    hasher = PasswordHasher(max_workers=1, max_pending=4)
+
+    async def run():
+        hashed = await hasher.hash("secretpassword")
+        return hashed, await hasher.verify("secretpassword", hashed), await hasher.verify("wrong", hashed)
+
+    try:
+        hashed, valid, invalid = asyncio.run(run())
+    finally:
+        hasher.shutdown()
+
+    assert hashed.startswith("$2b$")
+    assert valid is True
+    assert invalid is False
+    stats = hasher.stats()
+    assert stats["completed"] == 3
+    assert stats["pending"] == 0
+
+# Com a fila cheia, novas operações são rejeitadas em vez de enfileiradas
+def test_password_hasher_rejects_when_saturated():
+    hasher = PasswordHasher(max_workers=1, max_pending=1)
+
+    async def run():
+        return await asyncio.gather(
+            hasher.hash("password1"), hasher.hash("password2"), return_exceptions=True
+        )
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        hasher.shutdown()
+
+    assert isinstance(results[0], str)
+    assert isinstance(results[1], HashingPoolSaturated)
+    assert hasher.stats()["rejected"] == 1
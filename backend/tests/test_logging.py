@@ -0,0 +1,107 @@
+import json
+import logging
+import queue
+import sys
+
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.core import logging as app_logging
+from app.core.logging import JsonFormatter, NonBlockingQueueHandler, request_id_var
+
+client = TestClient(main.app)
+
+def auth_headers():
+    credentials = {"email": "logging@example.com", "password": "loggingpassword"}
+    client.post("/api/auth/register", json={**credentials, "username": "logginguser"})
+    token = client.post("/api/auth/login", json=credentials).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def access_records(caplog):
+    return [record for record in caplog.records if record.name == "app.access"]
+
+def test_json_formatter_includes_extra_fields_and_exceptions():
+    record = logging.LogRecord("app.access", logging.INFO, __file__, 1, "request %s", ("ok",), None)
+    record.status = 200
+    record.user_id = None
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "request ok"
+    assert entry["logger"] == "app.access"
+    assert (entry["status"], entry["user_id"]) == (200, None)
+    assert "args" not in entry
+
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logging.LogRecord("app", logging.ERROR, __file__, 1, "failed", (), sys.exc_info())
+    assert "ValueError: boom" in json.loads(JsonFormatter().format(record))["exc_info"]
+
+def test_queue_handler_never_blocks():
+    handler = NonBlockingQueueHandler(queue.Queue(1))
+    token = request_id_var.set("req-1")
+    try:
+        for i in range(3):
+            handler.handle(logging.LogRecord("app", logging.INFO, __file__, 1, "message %d", (i,), None))
+    finally:
+        request_id_var.reset(token)
+
+    queued = handler.queue.get_nowait()
+    assert (queued.msg, queued.args, queued.request_id) == ("message 0", None, "req-1")
+    assert handler.dropped == 2
+
+def test_access_log_records_route_template_and_user(caplog):
+    headers = auth_headers()
+    simulation_id = client.post(
+        "/api/simulations",
+        json={"property_value": 500000, "down_payment_percentage": 20, "contract_years": 30},
+        headers=headers,
+    ).json()["id"]
+
+    caplog.set_level(logging.INFO, logger="app.access")
+    caplog.clear()
+    response = client.get(f"/api/simulations/{simulation_id}", headers={**headers, "X-Request-ID": "abc123"})
+    assert response.headers["X-Request-ID"] == "abc123"
+
+    [record] = access_records(caplog)
+    assert record.method == "GET"
+    assert record.path == "/api/simulations/{simulation_id}"
+    assert record.status == 200
+    assert record.duration_ms >= 0
+    assert record.request_id == "abc123"
+    assert record.user_id is not None
+
+    # Sem rota: registra o caminho recebido; sem X-Request-ID, um id é gerado
+    caplog.clear()
+    response = client.get("/api/does-not-exist")
+    [record] = access_records(caplog)
+    assert (record.path, record.status, record.user_id) == ("/api/does-not-exist", 404, None)
+    assert record.request_id == response.headers["X-Request-ID"]
+
+def test_access_log_samples_only_successful_requests(caplog, monkeypatch):
+    monkeypatch.setattr(main, "LOG_SAMPLE_2XX_RATE", 0)
+    caplog.set_level(logging.INFO, logger="app.access")
+
+    assert client.get("/api/health").status_code == 200
+    assert access_records(caplog) == []
+    assert client.get("/api/simulations/").status_code == 401
+    assert [record.status for record in access_records(caplog)] == [401]
+
+    # Requisições lentas entram mesmo com amostragem zero
+    monkeypatch.setattr(main, "LOG_SLOW_REQUEST_MS", 0)
+    client.get("/api/health")
+    assert [record.status for record in access_records(caplog)] == [401, 200]
+
+def test_setup_logging_writes_json_through_listener(tmp_path, monkeypatch):
+    app_logging.shutdown_logging()
+    monkeypatch.setattr(app_logging, "LOG_DIR", tmp_path)
+    app_logging.setup_logging()
+    try:
+        assert app_logging.logging_stats()["configured"]
+        app_logging.logger.info("written by the listener thread", extra={"user_id": 7})
+    finally:
+        # stop() grava o que ainda estiver na fila antes de retornar
+        app_logging.shutdown_logging()
+
+    lines = [json.loads(line) for line in (tmp_path / "app.log").read_text().splitlines()]
+    assert {"message": "written by the listener thread", "user_id": 7}.items() <= lines[-1].items()
+    assert not app_logging.logging_stats()["configured"]
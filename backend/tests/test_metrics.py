@@ -0,0 +1,89 @@
+import os
+
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.core.metrics import (
+    MetricsRegistry,
+    MultiprocessExporter,
+    merge_snapshots,
+    render,
+    registry,
+)
+
+client = TestClient(main.app)
+
+def auth_headers():
+    credentials = {"email": "metrics@example.com", "password": "metricspassword"}
+    client.post("/api/auth/register", json={**credentials, "username": "metricsuser"})
+    token = client.post("/api/auth/login", json=credentials).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def samples(name):
+    return {tuple(labels): value for labels, value in registry.snapshot()[name]["samples"]}
+
+def test_histogram_renders_cumulative_buckets():
+    test_registry = MetricsRegistry()
+    histogram = test_registry.histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value, ('/a"b',))
+    test_registry.counter("events_total", "Events.").inc(2)
+
+    text = render(test_registry.snapshot())
+    assert '# TYPE latency_seconds histogram' in text
+    assert 'latency_seconds_bucket{route="/a\\"b",le="0.1"} 2' in text
+    assert 'latency_seconds_bucket{route="/a\\"b",le="1.0"} 3' in text
+    assert 'latency_seconds_bucket{route="/a\\"b",le="+Inf"} 4' in text
+    assert 'latency_seconds_count{route="/a\\"b"} 4' in text
+    assert 'events_total 2' in text
+
+def test_merge_sums_workers_and_drops_gauges_of_dead_processes():
+    worker = MetricsRegistry()
+    worker.counter("requests_total", "Requests.").inc(3)
+    worker.gauge("in_flight", "In flight.").inc(2)
+    worker.histogram("latency_seconds", "Latency.", buckets=(1,)).observe(0.5)
+    snapshot = worker.snapshot()
+
+    merged = merge_snapshots([(snapshot, True), (snapshot, False)])
+    assert merged["requests_total"]["samples"] == [[[], 6]]
+    assert merged["in_flight"]["samples"] == [[[], 2]]
+    assert merged["latency_seconds"]["samples"] == [[[], [[2, 0], 1.0, 2]]]
+
+def test_multiprocess_exporter_aggregates_snapshot_files(tmp_path):
+    worker = MetricsRegistry()
+    worker.counter("requests_total", "Requests.").inc()
+    exporter = MultiprocessExporter(worker, str(tmp_path), interval=60)
+    # Snapshot de outro worker, ainda vivo (o processo pai deste teste)
+    other = MetricsRegistry()
+    other.counter("requests_total", "Requests.").inc(4)
+    MultiprocessExporter(other, str(tmp_path), interval=60).flush()
+    os.replace(tmp_path / f"metrics-{os.getpid()}.json", tmp_path / f"metrics-{os.getppid()}.json")
+
+    assert exporter.collect()["requests_total"]["samples"] == [[[], 5]]
+
+def test_metrics_endpoint_records_route_templates_and_queries():
+    headers = auth_headers()
+    simulation_id = client.post(
+        "/api/simulations",
+        json={"property_value": 500000, "down_payment_percentage": 20, "contract_years": 30},
+        headers=headers,
+    ).json()["id"]
+    route = "/api/simulations/{simulation_id}"
+    before = samples("http_request_duration_seconds").get(("GET", route, "200"), [[], 0.0, 0])[2]
+    queries_before = samples("db_queries_per_request").get((route,), [[], 0, 0])[1]
+    client.get(f"/api/simulations/{simulation_id}", headers=headers)
+    client.get("/api/does-not-exist")
+
+    assert samples("http_request_duration_seconds")[("GET", route, "200")][2] == before + 1
+    assert ("GET", "<unmatched>", "404") in samples("http_request_duration_seconds")
+    # Toda requisição terminada sai do gauge
+    assert samples("http_requests_in_flight")[("GET",)] == 0
+    # Autenticação + leitura: ao menos uma consulta contada para esta requisição
+    assert samples("db_queries_per_request")[(route,)][1] >= queries_before + 1
+    assert samples("password_hashing_seconds")[("verify",)][2] >= 1
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert f'http_request_duration_seconds_count{{method="GET",route="{route}",status="200"}}' in response.text
+    assert "# TYPE db_pool_checkouts_total counter" in response.text
@@ -0,0 +1,83 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app import auth
+from app.core.profiler import Profiler, profiler
+
+client = TestClient(main.app)
+
+ADMIN = {"X-Admin-Token": "admin-secret"}
+
+@pytest.fixture
+def admin_profiler(tmp_path, monkeypatch):
+    monkeypatch.setattr(auth, "ADMIN_TOKEN", "admin-secret")
+    monkeypatch.setattr(profiler, "directory", tmp_path)
+    monkeypatch.setattr(profiler, "interval", 0.001)
+    yield profiler
+    profiler.configure(False, 0.0, [])
+
+def wait_for_profile(name, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if profiler.profile_path(name) is not None and not profiler.status()["running"]:
+            return
+        time.sleep(0.01)
+    raise AssertionError(f"profile {name} was not written")
+
+def test_admin_routes_require_token(monkeypatch):
+    monkeypatch.setattr(auth, "ADMIN_TOKEN", None)
+    assert client.get("/api/admin/profiler", headers=ADMIN).status_code == 404
+    monkeypatch.setattr(auth, "ADMIN_TOKEN", "admin-secret")
+    assert client.get("/api/admin/profiler").status_code == 403
+    assert client.get("/api/admin/profiler", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert client.get("/api/admin/profiler", headers=ADMIN).json()["enabled"] is False
+
+def test_profile_header_requires_admin_token(admin_profiler):
+    response = client.get("/api/health", headers={"X-Profile": "1"})
+    assert "X-Profile-Name" not in response.headers
+
+    response = client.get("/api/health", headers={"X-Profile": "1", **ADMIN})
+    name = response.headers["X-Profile-Name"]
+    wait_for_profile(name)
+
+    listed = client.get("/api/admin/profiler", headers=ADMIN).json()
+    assert name in [profile["name"] for profile in listed["profiles"]]
+    download = client.get(f"/api/admin/profiler/profiles/{name}", headers=ADMIN)
+    assert download.status_code == 200
+    # Formato "folded": pilha separada por ';' e a contagem de amostras
+    for line in download.text.splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert stack and int(count) > 0
+
+def test_configured_routes_are_sampled(admin_profiler):
+    response = client.put(
+        "/api/admin/profiler",
+        json={"enabled": True, "sample_rate": 1, "routes": ["/api/does-not-exist"]},
+        headers=ADMIN,
+    )
+    assert response.status_code == 422
+
+    response = client.put(
+        "/api/admin/profiler", json={"enabled": True, "sample_rate": 1, "routes": ["/api/health"]}, headers=ADMIN,
+    )
+    assert response.json()["routes"] == ["/api/health"]
+    profiled = client.get("/api/health")
+    wait_for_profile(profiled.headers["X-Profile-Name"])
+    assert "X-Profile-Name" not in client.get("/api/health/startup").headers
+
+    client.put("/api/admin/profiler", json={"enabled": False}, headers=ADMIN)
+    assert "X-Profile-Name" not in client.get("/api/health").headers
+
+def test_retention_and_profile_names(tmp_path):
+    test_profiler = Profiler(tmp_path, max_files=2, interval_ms=1, max_seconds=1)
+    for i in range(4):
+        path = tmp_path / f"profile-{i}.folded"
+        path.write_text("main;work 1\n")
+        time.sleep(0.01)
+    test_profiler._prune()
+    assert [p["name"] for p in test_profiler.profiles()] == ["profile-3.folded", "profile-2.folded"]
+    assert test_profiler.profile_path("../secret.folded") is None
+    assert test_profiler.profile_path("missing.folded") is None
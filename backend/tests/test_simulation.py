@@ -1,5 +1,12 @@
+import csv
+import io
+import json
+
+import pyarrow.parquet as pq
 from fastapi.testclient import TestClient
+from app import schemas
 from app.main import app
+from app.routers import simulations as simulations_router
 from datetime import datetime
 
 client = TestClient(app)
@@ -52,6 +59,230 @@ def test_create_and_list_simulation():
     assert response.status_code == 200
     assert any(sim["id"] == sim_id for sim in response.json())
 
+    # A listagem serializada direto pelo orjson é idêntica à do schema de resposta
+    for sim in response.json():
+        assert sim == json.loads(schemas.Simulation.parse_obj(sim).json())
+    assert response.json()[0] == client.get(f"/api/simulations/{response.json()[0]['id']}", headers=headers).json()
+
+def test_export_simulations(monkeypatch):
+    # Partições pequenas: a exportação atravessa vários blocos do cursor
+    monkeypatch.setattr(simulations_router, "EXPORT_CHUNK_ROWS", 2)
+    token = get_token(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    for i in range(5):
+        client.post(
+            "/api/simulations",
+            json={"property_value": 100000 + i, "down_payment_percentage": 20, "contract_years": 10 + i, "name": f"Export {i}"},
+            headers=headers
+        )
+    listed = client.get("/api/simulations", headers=headers).json()
+
+    ndjson_response = client.get("/api/simulations/export?format=ndjson", headers=headers)
+    assert ndjson_response.status_code == 200
+    assert ndjson_response.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line) for line in ndjson_response.text.splitlines()] == listed
+
+    csv_response = client.get("/api/simulations/export", headers=headers)
+    assert csv_response.status_code == 200
+    assert 'filename="simulations.csv"' in csv_response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(csv_response.text)))
+    assert [int(row["id"]) for row in rows] == [sim["id"] for sim in listed]
+    assert rows[0]["name"] == listed[0]["name"]
+    assert rows[0]["created_at"] == listed[0]["created_at"]
+    assert float(rows[0]["monthly_savings"]) == listed[0]["monthly_savings"]
+
+    parquet_response = client.get("/api/simulations/export?format=parquet", headers=headers)
+    assert parquet_response.status_code == 200
+    table = pq.read_table(io.BytesIO(parquet_response.content))
+    assert table.column_names == list(listed[0])
+    assert table.column("id").to_pylist() == [sim["id"] for sim in listed]
+    assert table.column("financing_amount").to_pylist() == [sim["financing_amount"] for sim in listed]
+
+    assert client.get("/api/simulations/export?format=xlsx", headers=headers).status_code == 422
+    assert client.get("/api/simulations/export").status_code == 401
+
+def test_import_simulations(monkeypatch):
+    # Blocos pequenos: erros e gravações atravessam vários blocos
+    monkeypatch.setattr(simulations_router, "IMPORT_CHUNK_ROWS", 2)
+    token = get_token(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    before = {sim["id"] for sim in client.get("/api/simulations?limit=1000", headers=headers).json()}
+
+    csv_content = (
+        "property_value,down_payment_percentage,contract_years,name,notes\n"
+        "500000,20,30,Import 1,\n"
+        "-1,20,30,Negativo,\n"
+        "300000,10,0,Import 2,\"linha 1\nlinha 2\"\n"
+        "400000,150,20,Entrada,\n"
+        "250000,0,15,,\n"
+    )
+    response = client.post(
+        "/api/simulations/import",
+        files={"file": ("simulations.csv", csv_content, "text/csv")},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["imported"] == 3
+    assert result["failed"] == 2
+    # Linhas do arquivo, contando o cabeçalho e a quebra de linha dentro das aspas
+    assert [error["line"] for error in result["errors"]] == [3, 6]
+    assert result["errors"][0]["errors"][0]["loc"] == ["property_value"]
+
+    imported = [
+        sim for sim in client.get("/api/simulations?limit=1000", headers=headers).json() if sim["id"] not in before
+    ]
+    by_name = {sim["name"]: sim for sim in imported}
+    assert set(by_name) == {"Import 1", "Import 2", None}
+    assert by_name["Import 1"]["financing_amount"] == 400000.0
+    assert by_name["Import 2"]["notes"] == "linha 1\nlinha 2"
+    assert by_name["Import 2"]["monthly_savings"] == by_name["Import 2"]["additional_costs"]
+
+    ndjson_content = b'{"property_value": 600000, "down_payment_percentage": 20, "contract_years": 30}\n\nnot json\n'
+    response = client.post(
+        "/api/simulations/import?format=ndjson",
+        files={"file": ("simulations.ndjson", ndjson_content, "application/x-ndjson")},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    assert response.json()["imported"] == 1
+    assert [error["line"] for error in response.json()["errors"]] == [3]
+
+    # O CSV da exportação é reimportado como está (colunas extras são ignoradas)
+    exported = client.get("/api/simulations/export", headers=headers).content
+    response = client.post(
+        "/api/simulations/import", files={"file": ("simulations.csv", exported, "text/csv")}, headers=headers
+    )
+    exported_rows = len(list(csv.DictReader(io.StringIO(exported.decode()))))
+    assert response.json() == {"imported": exported_rows, "failed": 0, "errors": []}
+
+    monkeypatch.setattr(simulations_router, "IMPORT_MAX_ERRORS", 1)
+    response = client.post(
+        "/api/simulations/import", files={"file": ("bad.csv", csv_content, "text/csv")}, headers=headers
+    )
+    assert response.json()["failed"] == 2
+    assert len(response.json()["errors"]) == 1
+
+    bad_encoding = client.post(
+        "/api/simulations/import", files={"file": ("bad.csv", b"property_value\n\xff\xfe\n", "text/csv")}, headers=headers
+    )
+    assert bad_encoding.status_code == 400
+    assert client.post("/api/simulations/import", files={"file": ("s.csv", csv_content, "text/csv")}).status_code == 401
+
+def test_list_simulations_with_cursor():
+    token = get_token(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    payload = {
+        "simulations": [
+            {"property_value": 100000 + i, "down_payment_percentage": 10, "contract_years": 10}
+            for i in range(5)
+        ]
+    }
+    ids = client.post("/api/simulations/batch", json=payload, headers=headers).json()["ids"]
+
+    seen = []
+    params = {"limit": 2}
+    # Limite de páginas: um cursor que não avança deve falhar, não travar a suíte
+    for _ in range(100):
+        response = client.get("/api/simulations", params=params, headers=headers)
+        assert response.status_code == 200
+        seen.extend(sim["id"] for sim in response.json())
+        next_cursor = response.headers.get("X-Next-Cursor")
+        if next_cursor is None:
+            break
+        params = {"limit": 2, "cursor": next_cursor}
+    else:
+        raise AssertionError("Cursor pagination did not terminate")
+
+    assert [sim_id for sim_id in seen if sim_id in ids] == sorted(ids, reverse=True)
+
+    invalid_response = client.get("/api/simulations", params={"cursor": "not-a-cursor"}, headers=headers)
+    assert invalid_response.status_code == 400
+
+    first_page = client.get("/api/simulations", params={"limit": 2}, headers=headers)
+    skip_with_cursor_response = client.get(
+        "/api/simulations",
+        params={"cursor": first_page.headers["X-Next-Cursor"], "skip": 2},
+        headers=headers
+    )
+    assert skip_with_cursor_response.status_code == 400
+    assert skip_with_cursor_response.json()["detail"] == "skip cannot be combined with cursor"
+
+def test_simulation_etags():
+    token = get_token(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    sim_id = client.post(
+        "/api/simulations",
+        json={"property_value": 500000, "down_payment_percentage": 20, "contract_years": 30},
+        headers=headers
+    ).json()["id"]
+
+    response = client.get(f"/api/simulations/{sim_id}", headers=headers)
+    etag = response.headers["ETag"]
+    assert etag.startswith('W/"')
+    assert response.headers["Vary"] == "Authorization"
+    not_modified = client.get(f"/api/simulations/{sim_id}", headers={**headers, "If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["ETag"] == etag
+    # Comparação fraca, com lista de candidatos
+    assert client.get(
+        f"/api/simulations/{sim_id}", headers={**headers, "If-None-Match": f'"other", {etag[2:]}'}
+    ).status_code == 304
+
+    list_etag = client.get("/api/simulations", headers=headers).headers["ETag"]
+    assert client.get("/api/simulations", headers={**headers, "If-None-Match": list_etag}).status_code == 304
+
+    # Edição no mesmo segundo (updated_at não muda no SQLite): a versão muda mesmo assim
+    client.put(
+        f"/api/simulations/{sim_id}",
+        json={"property_value": 600000, "down_payment_percentage": 20, "contract_years": 30},
+        headers=headers
+    )
+    changed = client.get(f"/api/simulations/{sim_id}", headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["property_value"] == 600000
+    assert changed.headers["ETag"] != etag
+    changed_list = client.get("/api/simulations", headers={**headers, "If-None-Match": list_etag})
+    assert changed_list.status_code == 200
+    assert changed_list.headers["ETag"] != list_etag
+
+    # Exclusão também invalida a lista
+    list_etag = changed_list.headers["ETag"]
+    client.delete(f"/api/simulations/{sim_id}", headers=headers)
+    assert client.get("/api/simulations", headers={**headers, "If-None-Match": list_etag}).status_code == 200
+
+def test_list_response_cache():
+    token = get_token(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    client.post(
+        "/api/simulations",
+        json={"property_value": 500000, "down_payment_percentage": 20, "contract_years": 30},
+        headers=headers
+    )
+    before = client.get("/api/health/cache").json()
+
+    first = client.get("/api/simulations?limit=1", headers=headers)
+    cached = client.get("/api/simulations?limit=1", headers=headers)
+    after = client.get("/api/health/cache").json()
+    assert after["hits"] == before["hits"] + 1
+    assert after["misses"] == before["misses"] + 1
+    assert cached.content == first.content
+    assert cached.headers["ETag"] == first.headers["ETag"]
+    assert cached.headers.get("X-Next-Cursor") == first.headers.get("X-Next-Cursor")
+    assert cached.headers["content-type"] == "application/json"
+
+    # Escrita invalida as páginas do usuário e muda a versão: a próxima leitura vai ao banco
+    created = client.post(
+        "/api/simulations",
+        json={"property_value": 700000, "down_payment_percentage": 20, "contract_years": 30},
+        headers=headers
+    ).json()
+    assert client.get("/api/health/cache").json()["invalidations"] == after["invalidations"] + 1
+    refreshed = client.get("/api/simulations?limit=1", headers=headers)
+    assert refreshed.json()[0]["id"] == created["id"]
+    assert client.get("/api/health/cache").json()["misses"] == after["misses"] + 1
+
 def test_read_simulation():
     token = get_token(client)
     headers = {"Authorization": f"Bearer {token}"}
@@ -157,6 +388,195 @@ def test_delete_simulation():
     non_existent_delete_response = client.delete("/api/simulations/99999", headers=headers)
     assert non_existent_delete_response.status_code == 404
 
+def test_preview_simulation():
+    # Preview é público e não grava nada no banco
+    response = client.post(
+        "/api/simulations/preview",
+        json={
+            "property_value": 500000,
+            "down_payment_percentage": 20,
+            "contract_years": 30,
+            "name": "Preview"
+        }
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert "id" not in data
+    assert data["name"] == "Preview"
+    assert data["down_payment_value"] == 100000.0
+    assert data["financing_amount"] == 400000.0
+    assert data["additional_costs"] == 75000.0
+    assert data["monthly_savings"] == 75000.0 / 360
+
+    invalid_response = client.post(
+        "/api/simulations/preview",
+        json={"property_value": 500000, "down_payment_percentage": 120, "contract_years": 30}
+    )
+    assert invalid_response.status_code == 422
+
+    negative_years_response = client.post(
+        "/api/simulations/preview",
+        json={"property_value": 500000, "down_payment_percentage": 20, "contract_years": -1}
+    )
+    assert negative_years_response.status_code == 422
+
+def test_sweep_simulations():
+    response = client.post(
+        "/api/simulations/sweep",
+        json={
+            "property_value": {"start": 100000, "stop": 300000, "steps": 3},
+            "axis": "contract_years",
+            "axis_range": {"start": 0, "stop": 30, "steps": 4},
+            "down_payment_percentage": 20
+        }
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["property_value"] == [100000.0, 200000.0, 300000.0]
+    assert data["contract_years"] == [0, 10, 20, 30]
+    assert data["down_payment_percentage"] == 20.0
+    assert len(data["monthly_savings"]) == 3
+    assert all(len(row) == 4 for row in data["monthly_savings"])
+    assert data["financing_amount"][1][2] == 160000.0
+    assert data["monthly_savings"][2][0] == 300000.0 * 0.15
+    assert data["monthly_savings"][2][3] == 300000.0 * 0.15 / 360
+
+    # Passos que arredondam para o mesmo prazo não geram colunas repetidas
+    dense_response = client.post(
+        "/api/simulations/sweep",
+        json={
+            "property_value": {"start": 100000, "stop": 100000, "steps": 1},
+            "axis": "contract_years",
+            "axis_range": {"start": 10, "stop": 12, "steps": 5},
+            "down_payment_percentage": 20
+        }
+    )
+    assert dense_response.status_code == 200
+    dense = dense_response.json()
+    assert dense["contract_years"] == [10, 11, 12]
+    assert all(len(row) == 3 for row in dense["monthly_savings"])
+
+    # Varrendo a entrada, o prazo fixo é obrigatório
+    missing_fixed_response = client.post(
+        "/api/simulations/sweep",
+        json={
+            "property_value": {"start": 100000, "stop": 300000, "steps": 3},
+            "axis_range": {"start": 0, "stop": 50, "steps": 2}
+        }
+    )
+    assert missing_fixed_response.status_code == 422
+
+    too_many_steps_response = client.post(
+        "/api/simulations/sweep",
+        json={
+            "property_value": {"start": 100000, "stop": 300000, "steps": 1000},
+            "axis_range": {"start": 0, "stop": 50, "steps": 2},
+            "contract_years": 30
+        }
+    )
+    assert too_many_steps_response.status_code == 422
+
+def test_create_simulations_batch():
+    token = get_token(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    payload = {
+        "simulations": [
+            {"property_value": 500000, "down_payment_percentage": 20, "contract_years": 30, "name": "Batch 1"},
+            {"property_value": 300000, "down_payment_percentage": 10, "contract_years": 0, "name": "Batch 2"},
+        ]
+    }
+    response = client.post("/api/simulations/batch", json=payload, headers=headers)
+    assert response.status_code == 200
+    ids = response.json()["ids"]
+    assert len(ids) == 2
+
+    read_response = client.get(f"/api/simulations/{ids[1]}", headers=headers)
+    assert read_response.status_code == 200
+    read_sim_data = read_response.json()
+    assert read_sim_data["name"] == "Batch 2"
+    assert read_sim_data["financing_amount"] == 270000.0
+    assert read_sim_data["monthly_savings"] == 45000.0
+
+    # Lote vazio e item inválido são rejeitados pela validação
+    assert client.post("/api/simulations/batch", json={"simulations": []}, headers=headers).status_code == 422
+    invalid_payload = {"simulations": [{"property_value": -1, "down_payment_percentage": 20, "contract_years": 30}]}
+    assert client.post("/api/simulations/batch", json=invalid_payload, headers=headers).status_code == 422
+
+def test_read_simulation_schedule():
+    token = get_token(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    create_response = client.post(
+        "/api/simulations",
+        json={"property_value": 500000, "down_payment_percentage": 20, "contract_years": 35},
+        headers=headers
+    )
+    assert create_response.status_code == 200
+    sim_id = create_response.json()["id"]
+
+    # NDJSON (padrão): uma linha por mês de contrato
+    response = client.get(
+        f"/api/simulations/{sim_id}/schedule",
+        params={"annual_interest_rate": 10, "system": "sac"},
+        headers=headers
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 35 * 12
+    assert rows[0]["amortization"] == round(400000 / 420, 2)
+    assert rows[-1]["balance"] == 0.0
+
+    # CSV: cabeçalho + uma linha por mês
+    csv_response = client.get(
+        f"/api/simulations/{sim_id}/schedule",
+        params={"annual_interest_rate": 10, "system": "price", "format": "csv"},
+        headers=headers
+    )
+    assert csv_response.status_code == 200
+    assert csv_response.headers["content-type"].startswith("text/csv")
+    assert len(csv_response.text.splitlines()) == 35 * 12 + 1
+
+    # Taxa obrigatória e simulação inexistente
+    assert client.get(f"/api/simulations/{sim_id}/schedule", headers=headers).status_code == 422
+    not_found_response = client.get(
+        "/api/simulations/99999/schedule", params={"annual_interest_rate": 10}, headers=headers
+    )
+    assert not_found_response.status_code == 404
+
+def test_run_simulation_monte_carlo():
+    token = get_token(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    create_response = client.post(
+        "/api/simulations",
+        json={"property_value": 500000, "down_payment_percentage": 20, "contract_years": 30},
+        headers=headers
+    )
+    assert create_response.status_code == 200
+    sim_id = create_response.json()["id"]
+
+    payload = {
+        "monthly_income": 15000,
+        "interest_rate": {"mean": 10, "std": 2},
+        "income_growth": {"mean": 3, "std": 2},
+        "property_appreciation": {"mean": 4, "std": 6},
+        "paths": 6000,
+        "seed": 123
+    }
+    response = client.post(f"/api/simulations/{sim_id}/monte-carlo", json=payload, headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["paths"] == 6000
+    assert data["seed"] == 123
+    assert data["total_cost"]["p5"] <= data["total_cost"]["p50"] <= data["total_cost"]["p95"]
+    assert 0 <= data["commitment_breach_probability"] <= 1
+
+    # Mesma semente, mesmo resultado
+    repeat_response = client.post(f"/api/simulations/{sim_id}/monte-carlo", json=payload, headers=headers)
+    assert repeat_response.json() == data
+
+    not_found_response = client.post("/api/simulations/99999/monte-carlo", json=payload, headers=headers)
+    assert not_found_response.status_code == 404
+
 def test_unauthorized_simulation_access():
     # Attempt to access list without token
     response_list = client.get("/api/simulations")
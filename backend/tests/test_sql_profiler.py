@@ -0,0 +1,73 @@
+import logging
+
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.core import sql_profiler
+from app.core.sql_profiler import RequestStats, parameter_shape
+
+client = TestClient(main.app)
+
+def auth_headers():
+    credentials = {"email": "profiler@example.com", "password": "profilerpassword"}
+    client.post("/api/auth/register", json={**credentials, "username": "profileruser"})
+    token = client.post("/api/auth/login", json=credentials).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def create_simulation(headers):
+    return client.post(
+        "/api/simulations/",
+        json={"property_value": 500000, "down_payment_percentage": 20, "contract_years": 30},
+        headers=headers,
+    ).json()["id"]
+
+def test_parameter_shape_hides_values():
+    assert parameter_shape({"email": "a@b.c", "ids": [1, 2, 3], "limit": 10}) == {
+        "email": "str", "ids": "list[3]", "limit": "int",
+    }
+    assert parameter_shape(("secret", None)) == ["str", "NoneType"]
+    assert parameter_shape([(1, "x"), (2, "y")], executemany=True) == {"rows": 2, "row": ["int", "str"]}
+    assert parameter_shape([], executemany=True) == {"rows": 0, "row": None}
+
+def test_request_stats_keeps_slowest_statement():
+    stats = RequestStats()
+    stats.queries = 2
+    stats.record("SELECT 1", 0.002)
+    stats.record("SELECT 2", 0.005)
+    assert stats.slowest_statement == "SELECT 2"
+    assert stats.server_timing() == 'db;dur=7.000;desc="2 queries", db-slowest;dur=5.000'
+
+def test_access_log_and_server_timing_carry_query_stats(caplog, monkeypatch):
+    headers = auth_headers()
+    simulation_id = create_simulation(headers)
+
+    caplog.set_level(logging.INFO, logger="app.access")
+    caplog.clear()
+    response = client.get(f"/api/simulations/{simulation_id}", headers=headers)
+    assert "Server-Timing" not in response.headers
+    [record] = [r for r in caplog.records if r.name == "app.access"]
+    assert record.db_queries >= 1
+    assert record.db_ms >= record.db_slowest_ms >= 0
+
+    monkeypatch.setattr(main, "DEBUG", True)
+    response = client.get(f"/api/simulations/{simulation_id}", headers=headers)
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+
+def test_slow_queries_are_logged_with_parameter_shapes(caplog, monkeypatch):
+    headers = auth_headers()
+    simulation_id = create_simulation(headers)
+    monkeypatch.setattr(sql_profiler, "DB_SLOW_QUERY_MS", 0)
+    caplog.set_level(logging.WARNING, logger="app.sql")
+    caplog.clear()
+
+    response = client.get(f"/api/simulations/{simulation_id}", headers={**headers, "X-Request-ID": "slow-1"})
+    assert response.status_code == 200
+    records = [r for r in caplog.records if r.name == "app.sql"]
+    assert records
+    assert all(r.getMessage() == "Slow query" and r.duration_ms >= 0 for r in records)
+    # Só os tipos dos parâmetros, nunca os valores
+    shapes = [r.parameters for r in records if r.parameters]
+    assert shapes
+    for shape in shapes:
+        values = shape.values() if isinstance(shape, dict) else shape
+        assert all(isinstance(value, str) and value[0].isalpha() for value in values)